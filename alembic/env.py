@@ -1,4 +1,5 @@
 import asyncio
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import Connection, engine_from_config, pool
@@ -28,6 +29,21 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+# Partitions of meme are created by the migrations and not mapped, autogenerate
+# must not drop them nor the objects attached to them.
+PARTITION_TABLE = re.compile(r"meme_p\d+")
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    if type_ == "table":
+        return not PARTITION_TABLE.fullmatch(name)
+    if type_ in ("index", "unique_constraint"):
+        return not PARTITION_TABLE.fullmatch(object.table.name)
+    if type_ == "foreign_key_constraint":
+        return not PARTITION_TABLE.fullmatch(object.referred_table.name)
+    return True
+
+
 def get_database_uri() -> str:
     return get_settings().sqlalchemy_database_uri.render_as_string(hide_password=False)
 
@@ -52,6 +68,7 @@ def run_migrations_offline() -> None:
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
         compare_server_default=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -60,7 +77,10 @@ def run_migrations_offline() -> None:
 
 def do_run_migrations(connection: Connection | None) -> None:
     context.configure(
-        connection=connection, target_metadata=target_metadata, compare_type=True
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -0,0 +1,48 @@
+"""notify on new public meme
+
+Revision ID: 6b3e8f0a2c71
+Revises: 2f6a9c1d8e54
+Create Date: 2026-10-19 19:00:22.407115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b3e8f0a2c71'
+down_revision: Union[str, None] = '2f6a9c1d8e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE FUNCTION meme_notify_new() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('new_meme', json_build_object(
+                'id', NEW.id,
+                'description', NEW.description,
+                'image_url', NEW.image_url,
+                'visibility', NEW.visibility,
+                'owner_id', NEW.owner_id,
+                'tags', NEW.tags
+            )::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER meme_notify_new AFTER INSERT ON meme
+        FOR EACH ROW WHEN (NEW.visibility) EXECUTE FUNCTION meme_notify_new()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER meme_notify_new ON meme")
+    op.execute("DROP FUNCTION meme_notify_new()")
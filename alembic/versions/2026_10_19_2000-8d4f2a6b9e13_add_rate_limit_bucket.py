@@ -0,0 +1,34 @@
+"""add rate limit bucket
+
+Revision ID: 8d4f2a6b9e13
+Revises: 6b3e8f0a2c71
+Create Date: 2026-10-19 20:00:51.774062
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f2a6b9e13'
+down_revision: Union[str, None] = '6b3e8f0a2c71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Buckets are disposable, skip the WAL for the shared rate limit backend.
+    op.create_table('rate_limit_bucket',
+    sa.Column('key', sa.String(length=256), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('allowed', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key'),
+    prefixes=['UNLOGGED']
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_bucket')
@@ -0,0 +1,52 @@
+"""notify on changed meme
+
+Revision ID: c7a1e4d92b56
+Revises: 8d4f2a6b9e13
+Create Date: 2026-10-19 21:00:17.338590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a1e4d92b56'
+down_revision: Union[str, None] = '8d4f2a6b9e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE FUNCTION meme_notify_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('changed_meme', OLD.id::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    # View counter flushes only touch view_count and must not fire it.
+    op.execute(
+        """
+        CREATE TRIGGER meme_notify_changed AFTER UPDATE ON meme
+        FOR EACH ROW WHEN (
+            (OLD.description, OLD.image_url, OLD.visibility, OLD.tags)
+            IS DISTINCT FROM (NEW.description, NEW.image_url, NEW.visibility, NEW.tags)
+        ) EXECUTE FUNCTION meme_notify_changed()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER meme_notify_deleted AFTER DELETE ON meme
+        FOR EACH ROW EXECUTE FUNCTION meme_notify_changed()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER meme_notify_deleted ON meme")
+    op.execute("DROP TRIGGER meme_notify_changed ON meme")
+    op.execute("DROP FUNCTION meme_notify_changed()")
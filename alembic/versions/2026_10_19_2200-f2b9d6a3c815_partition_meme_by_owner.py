@@ -0,0 +1,248 @@
+"""partition meme by owner
+
+Revision ID: f2b9d6a3c815
+Revises: c7a1e4d92b56
+Create Date: 2026-10-19 22:00:43.581906
+
+Moves meme to a table hash partitioned on owner_id without blocking writes
+for the duration of the copy:
+
+1. create the partitioned table next to the old one,
+2. mirror every write on the old table into it with a trigger,
+3. backfill existing rows in committed id batches, locking each batch
+   against concurrent deletes so none is resurrected, and the owner of
+   their timeline entries, new entries get it from a trigger,
+4. swap the tables inside one short ACCESS EXCLUSIVE transaction that
+   only changes the catalog, adding the constraints NOT VALID,
+5. validate the constraints after the swap has committed.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b9d6a3c815'
+down_revision: Union[str, None] = 'c7a1e4d92b56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+BATCH_SIZE = 10_000
+COLUMNS = 'id, description, image_url, visibility, variants, view_count, phash, tags, owner_id'
+INDEXES = ['ix_meme_popular', 'ix_meme_owner_id_id', 'ix_meme_tags']
+
+
+def create_meme_indexes(table: str) -> None:
+    op.create_index('ix_meme_popular', table, [sa.text('view_count DESC'), sa.text('id DESC')], unique=False, postgresql_where=sa.text('visibility IS true'))
+    op.create_index('ix_meme_owner_id_id', table, ['owner_id', 'id'], unique=False)
+    op.create_index('ix_meme_tags', table, ['tags'], unique=False, postgresql_using='gin')
+
+
+def create_notify_triggers() -> None:
+    op.execute("CREATE TRIGGER meme_notify_new AFTER INSERT ON meme FOR EACH ROW WHEN (NEW.visibility) EXECUTE FUNCTION meme_notify_new()")
+    op.execute(
+        """
+        CREATE TRIGGER meme_notify_changed AFTER UPDATE ON meme
+        FOR EACH ROW WHEN (
+            (OLD.description, OLD.image_url, OLD.visibility, OLD.tags)
+            IS DISTINCT FROM (NEW.description, NEW.image_url, NEW.visibility, NEW.tags)
+        ) EXECUTE FUNCTION meme_notify_changed()
+        """
+    )
+    op.execute("CREATE TRIGGER meme_notify_deleted AFTER DELETE ON meme FOR EACH ROW EXECUTE FUNCTION meme_notify_changed()")
+
+
+def drop_notify_triggers(table: str) -> None:
+    for trigger in ('meme_notify_new', 'meme_notify_changed', 'meme_notify_deleted'):
+        op.execute(f"DROP TRIGGER {trigger} ON {table}")
+
+
+def upgrade() -> None:
+    op.create_table('meme_partitioned',
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('meme_id_seq')"), nullable=False),
+    sa.Column('description', sa.String(length=512), nullable=True),
+    sa.Column('image_url', sa.String(length=512), nullable=False),
+    sa.Column('visibility', sa.Boolean(), nullable=False),
+    sa.Column('variants', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+    sa.Column('view_count', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('phash', sa.BigInteger(), nullable=True),
+    sa.Column('tags', postgresql.ARRAY(sa.String(length=64)), server_default='{}', nullable=False),
+    sa.Column('owner_id', sa.Uuid(as_uuid=False), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'owner_id', name='meme_partitioned_pkey'),
+    postgresql_partition_by='HASH (owner_id)'
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE meme_p{remainder} PARTITION OF meme_partitioned "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+
+    # Index names are schema wide, free them for the partitioned table.
+    for index in INDEXES:
+        op.execute(f"ALTER INDEX {index} RENAME TO {index}_old")
+    create_meme_indexes('meme_partitioned')
+
+    op.execute(
+        f"""
+        CREATE FUNCTION meme_mirror() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM meme_partitioned WHERE id = OLD.id AND owner_id = OLD.owner_id;
+                RETURN NULL;
+            END IF;
+            INSERT INTO meme_partitioned ({COLUMNS})
+            VALUES (NEW.id, NEW.description, NEW.image_url, NEW.visibility, NEW.variants,
+                    NEW.view_count, NEW.phash, NEW.tags, NEW.owner_id)
+            ON CONFLICT (id, owner_id) DO UPDATE SET
+                description = EXCLUDED.description,
+                image_url = EXCLUDED.image_url,
+                visibility = EXCLUDED.visibility,
+                variants = EXCLUDED.variants,
+                view_count = EXCLUDED.view_count,
+                phash = EXCLUDED.phash,
+                tags = EXCLUDED.tags;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("CREATE TRIGGER meme_mirror AFTER INSERT OR UPDATE OR DELETE ON meme FOR EACH ROW EXECUTE FUNCTION meme_mirror()")
+
+    op.add_column('timeline_entry', sa.Column('meme_owner_id', sa.Uuid(as_uuid=False), nullable=True))
+    # Entries written by the running app during the backfill get their owner
+    # here, the batches below fill in the existing ones.
+    op.execute(
+        """
+        CREATE FUNCTION timeline_entry_owner() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.meme_owner_id IS NULL THEN
+                NEW.meme_owner_id := (SELECT owner_id FROM meme WHERE id = NEW.meme_id);
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute("CREATE TRIGGER timeline_entry_owner BEFORE INSERT ON timeline_entry FOR EACH ROW EXECUTE FUNCTION timeline_entry_owner()")
+    # Checked once the swap is committed, then SET NOT NULL skips its scan.
+    op.execute("ALTER TABLE timeline_entry ADD CONSTRAINT timeline_entry_meme_owner_id_not_null CHECK (meme_owner_id IS NOT NULL) NOT VALID")
+
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        max_id = connection.scalar(sa.text("SELECT coalesce(max(id), 0) FROM meme"))
+        for start in range(0, max_id + 1, BATCH_SIZE):
+            connection.execute(
+                sa.text(
+                    f"""
+                    INSERT INTO meme_partitioned ({COLUMNS})
+                    SELECT {COLUMNS} FROM meme
+                    WHERE id >= :start AND id < :end
+                    FOR SHARE
+                    ON CONFLICT (id, owner_id) DO NOTHING
+                    """
+                ),
+                {"start": start, "end": start + BATCH_SIZE},
+            )
+            connection.execute(
+                sa.text(
+                    """
+                    UPDATE timeline_entry SET meme_owner_id = meme.owner_id
+                    FROM meme
+                    WHERE timeline_entry.meme_id = meme.id
+                    AND meme.id >= :start AND meme.id < :end
+                    AND timeline_entry.meme_owner_id IS NULL
+                    """
+                ),
+                {"start": start, "end": start + BATCH_SIZE},
+            )
+
+    # Only catalog changes under the lock, no statement here scans a table.
+    op.execute("LOCK TABLE meme, timeline_entry IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER timeline_entry_owner ON timeline_entry")
+    op.execute("DROP FUNCTION timeline_entry_owner()")
+    op.drop_constraint('timeline_entry_meme_id_fkey', 'timeline_entry', type_='foreignkey')
+
+    drop_notify_triggers('meme')
+    op.execute("DROP TRIGGER meme_mirror ON meme")
+    op.execute("DROP FUNCTION meme_mirror()")
+    op.execute("ALTER TABLE meme ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER TABLE meme RENAME TO meme_old")
+    op.execute("ALTER TABLE meme_partitioned RENAME TO meme")
+    op.execute("ALTER TABLE meme RENAME CONSTRAINT meme_partitioned_pkey TO meme_pkey_partitioned")
+    op.execute("ALTER SEQUENCE meme_id_seq OWNED BY meme.id")
+    op.drop_table('meme_old')
+    op.execute("ALTER TABLE meme RENAME CONSTRAINT meme_pkey_partitioned TO meme_pkey")
+
+    op.execute(
+        """
+        ALTER TABLE timeline_entry ADD CONSTRAINT timeline_entry_meme_id_meme_owner_id_fkey
+        FOREIGN KEY (meme_id, meme_owner_id) REFERENCES meme (id, owner_id)
+        ON DELETE CASCADE NOT VALID
+        """
+    )
+    create_notify_triggers()
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION meme_notify_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('changed_meme', OLD.owner_id || ':' || OLD.id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+
+    # The swap commits first. Validating only takes a SHARE UPDATE EXCLUSIVE
+    # lock, reads and writes go on during the scans.
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE timeline_entry VALIDATE CONSTRAINT timeline_entry_meme_owner_id_not_null")
+        op.execute("ALTER TABLE timeline_entry VALIDATE CONSTRAINT timeline_entry_meme_id_meme_owner_id_fkey")
+        op.alter_column('timeline_entry', 'meme_owner_id', nullable=False)
+        op.drop_constraint('timeline_entry_meme_owner_id_not_null', 'timeline_entry', type_='check')
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION meme_notify_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('changed_meme', OLD.id::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.drop_constraint('timeline_entry_meme_id_meme_owner_id_fkey', 'timeline_entry', type_='foreignkey')
+    drop_notify_triggers('meme')
+    for index in INDEXES:
+        op.execute(f"ALTER INDEX {index} RENAME TO {index}_partitioned")
+    op.execute("ALTER TABLE meme RENAME CONSTRAINT meme_pkey TO meme_pkey_partitioned")
+    op.execute("ALTER TABLE meme RENAME TO meme_partitioned")
+
+    op.create_table('meme',
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('meme_id_seq')"), nullable=False),
+    sa.Column('description', sa.String(length=512), nullable=True),
+    sa.Column('image_url', sa.String(length=512), nullable=False),
+    sa.Column('visibility', sa.Boolean(), nullable=False),
+    sa.Column('owner_id', sa.Uuid(as_uuid=False), nullable=False),
+    sa.Column('variants', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+    sa.Column('view_count', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('tags', postgresql.ARRAY(sa.String(length=64)), server_default='{}', nullable=False),
+    sa.Column('phash', sa.BigInteger(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(f"INSERT INTO meme ({COLUMNS}) SELECT {COLUMNS} FROM meme_partitioned")
+    op.execute("ALTER TABLE meme_partitioned ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE meme_id_seq OWNED BY meme.id")
+    op.drop_table('meme_partitioned')
+    create_meme_indexes('meme')
+    create_notify_triggers()
+
+    op.create_foreign_key('timeline_entry_meme_id_fkey', 'timeline_entry', 'meme', ['meme_id'], ['id'], ondelete='CASCADE')
+    op.drop_column('timeline_entry', 'meme_owner_id')
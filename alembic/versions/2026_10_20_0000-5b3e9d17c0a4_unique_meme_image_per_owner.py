@@ -0,0 +1,53 @@
+"""unique meme image per owner
+
+Revision ID: 5b3e9d17c0a4
+Revises: a4c8e2f61d97
+Create Date: 2026-10-20 00:00:41.207395
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b3e9d17c0a4'
+down_revision: Union[str, None] = 'a4c8e2f61d97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def partitions() -> list[str]:
+    return op.get_bind().scalars(
+        sa.text("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'meme'::regclass ORDER BY 1")
+    ).all()
+
+
+def upgrade() -> None:
+    # Partitioned indexes can not be built concurrently, so each partition's
+    # index is, and the parent index is then created empty and attached.
+    with op.get_context().autocommit_block():
+        # Racing confirms of one upload may already have created several
+        # memes sharing its image, keep the first. The counter reconciliation
+        # repairs the owners' meme counts.
+        op.execute(
+            """
+            DELETE FROM meme USING meme AS kept
+            WHERE kept.owner_id = meme.owner_id
+            AND kept.image_url = meme.image_url
+            AND kept.id < meme.id
+            """
+        )
+        for partition in partitions():
+            # A failed concurrent build leaves an invalid index behind.
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {partition}_owner_id_image_url_idx")
+            op.execute(f"CREATE UNIQUE INDEX CONCURRENTLY {partition}_owner_id_image_url_idx ON {partition} (owner_id, image_url)")
+
+    op.execute("CREATE UNIQUE INDEX ix_meme_owner_id_image_url ON ONLY meme (owner_id, image_url)")
+    for partition in partitions():
+        op.execute(f"ALTER INDEX ix_meme_owner_id_image_url ATTACH PARTITION {partition}_owner_id_image_url_idx")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_meme_owner_id_image_url', table_name='meme')
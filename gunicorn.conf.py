@@ -0,0 +1,50 @@
+# Production server configuration, picked up automatically by `gunicorn`.
+#
+# The application and settings are imported once in the master and forked
+# into the workers. `kill -HUP <master>` gracefully restarts the workers with
+# the preloaded code; to roll out new code without downtime send `USR2` to
+# start a new master next to the old one, then `QUIT` the old master.
+import os
+import signal
+import threading
+import time
+
+from src.config import get_settings
+from src.core.worker import get_rss_bytes, get_worker_count
+
+settings = get_settings().server
+
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = settings.bind
+workers = get_worker_count()
+preload_app = True
+graceful_timeout = settings.graceful_timeout
+keepalive = settings.keepalive
+# The uvicorn worker rewrites the client address from X-Forwarded-For when
+# the connection comes from one of these.
+forwarded_allow_ips = ",".join(settings.forwarded_allow_ips)
+max_requests = settings.max_requests
+max_requests_jitter = settings.max_requests_jitter
+
+
+def watch_memory(worker) -> None:
+    limit = settings.max_worker_memory_mb * 1024 * 1024
+    while worker.alive:
+        time.sleep(settings.memory_check_interval_secs)
+        rss = get_rss_bytes()
+        if rss > limit:
+            worker.log.info(
+                "Worker %s uses %s bytes, over the %s limit; recycling.",
+                worker.pid,
+                rss,
+                limit,
+            )
+            # Uvicorn treats SIGTERM as a graceful shutdown, after which the
+            # master forks a fresh worker.
+            os.kill(worker.pid, signal.SIGTERM)
+            return
+
+
+def post_worker_init(worker) -> None:
+    if settings.max_worker_memory_mb is not None:
+        threading.Thread(target=watch_memory, args=(worker,), daemon=True).start()
@@ -6,4 +6,4 @@ echo "Run migrations..."
 alembic upgrade head
 
 echo "Run application..."
-uvicorn src.main:app --host 0.0.0.0 --port 8000
+exec gunicorn src.main:app
@@ -0,0 +1,202 @@
+"""Benchmark per-owner meme queries and check they prune to one partition.
+
+Run it against the same database before and after the partitioning
+migration (revisions c7a1e4d92b56 and f2b9d6a3c815) to compare latencies:
+
+    python -m scripts.bench_meme_partitioning --seed --users 1000 --memes 200
+    python -m scripts.bench_meme_partitioning --check-pruning
+
+Settings are read from the environment like the app. `--seed` replaces the
+users it created on a previous run; it never touches other data. UPDATE and
+DELETE are timed inside transactions that are rolled back.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import Executable, delete, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.api.models import Meme
+from src.core import database
+
+BENCH_EMAIL_DOMAIN = "bench.invalid"
+
+
+def per_owner_statements(owner_id: str, meme_id: int) -> dict[str, Executable]:
+    """The per-owner statements of the API, as issued by the endpoints."""
+    return {
+        "get": select(Meme).where(Meme.id == meme_id, Meme.owner_id == owner_id),
+        "list": select(Meme)
+        .where(Meme.owner_id == owner_id)
+        .order_by(Meme.id.desc())
+        .limit(10),
+        "update": update(Meme)
+        .where(Meme.id == meme_id, Meme.owner_id == owner_id)
+        .values(description="benchmark"),
+        "delete": delete(Meme).where(Meme.id == meme_id, Meme.owner_id == owner_id),
+    }
+
+
+def to_sql(statement: Executable) -> str:
+    return str(
+        statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+def scanned_relations(plan: dict) -> set[str]:
+    relations = set()
+    if "Relation Name" in plan:
+        relations.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        relations |= scanned_relations(child)
+    return relations
+
+
+async def seed(connection: AsyncConnection, users: int, memes: int) -> None:
+    await connection.execute(
+        text('DELETE FROM "user" WHERE email LIKE :pattern'),
+        {"pattern": f"%@{BENCH_EMAIL_DOMAIN}"},
+    )
+    await connection.execute(
+        text(
+            """
+            INSERT INTO "user" (user_id, email, hashed_password)
+            SELECT gen_random_uuid(), 'user' || i || '@' || :domain, 'x'
+            FROM generate_series(1, :users) AS i
+            """
+        ),
+        {"users": users, "domain": BENCH_EMAIL_DOMAIN},
+    )
+    await connection.execute(
+        text(
+            """
+            INSERT INTO meme (description, image_url, visibility, owner_id)
+            SELECT 'meme ' || i, 'bench/' || u.user_id || '/' || i, i % 4 <> 0,
+                u.user_id
+            FROM "user" AS u, generate_series(1, :memes) AS i
+            WHERE u.email LIKE :pattern
+            """
+        ),
+        {"memes": memes, "pattern": f"%@{BENCH_EMAIL_DOMAIN}"},
+    )
+    await connection.execute(
+        text(
+            """
+            UPDATE "user" SET meme_count = :memes,
+                public_meme_count = :memes - :memes / 4
+            WHERE email LIKE :pattern
+            """
+        ),
+        {"memes": memes, "pattern": f"%@{BENCH_EMAIL_DOMAIN}"},
+    )
+    await connection.execute(text('ANALYZE "user", meme'))
+    await connection.commit()
+
+
+async def sample_targets(
+    connection: AsyncConnection, count: int
+) -> list[tuple[str, int]]:
+    result = await connection.execute(
+        text(
+            """
+            SELECT m.owner_id::text, m.id FROM meme AS m
+            JOIN "user" AS u ON u.user_id = m.owner_id
+            WHERE u.email LIKE :pattern
+            ORDER BY random() LIMIT :count
+            """
+        ),
+        {"pattern": f"%@{BENCH_EMAIL_DOMAIN}", "count": count},
+    )
+    return [(owner_id, meme_id) for owner_id, meme_id in result]
+
+
+async def is_partitioned(connection: AsyncConnection) -> bool:
+    return bool(
+        await connection.scalar(
+            text("SELECT relkind = 'p' FROM pg_class WHERE relname = 'meme'")
+        )
+    )
+
+
+async def check_pruning(
+    connection: AsyncConnection, owner_id: str, meme_id: int
+) -> bool:
+    pruned = True
+    for name, statement in per_owner_statements(owner_id, meme_id).items():
+        plan = await connection.scalar(
+            text(f"EXPLAIN (FORMAT JSON) {to_sql(statement)}")
+        )
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        partitions = {
+            relation
+            for relation in scanned_relations(plan[0]["Plan"])
+            if relation.startswith("meme_p")
+        }
+        ok = len(partitions) == 1
+        pruned &= ok
+        print(f"{name:>8}: {'pruned' if ok else 'NOT PRUNED'} {sorted(partitions)}")
+    return pruned
+
+
+async def benchmark(
+    connection: AsyncConnection, targets: list[tuple[str, int]]
+) -> None:
+    for name in per_owner_statements(*targets[0]):
+        timings = []
+        for owner_id, meme_id in targets:
+            statement = per_owner_statements(owner_id, meme_id)[name]
+            started = time.perf_counter()
+            await connection.execute(statement)
+            timings.append((time.perf_counter() - started) * 1000)
+            await connection.rollback()
+        timings.sort()
+        print(
+            f"{name:>8}: p50 {statistics.median(timings):.3f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.3f} ms, "
+            f"n={len(timings)}"
+        )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--memes", type=int, default=200, help="memes per user")
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--check-pruning", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        async with database.get_async_engine().connect() as connection:
+            if args.seed:
+                await seed(connection, args.users, args.memes)
+            targets = await sample_targets(connection, args.samples)
+            if not targets:
+                print("No benchmark data, run with --seed first.")
+                return 1
+            random.shuffle(targets)
+
+            if args.check_pruning:
+                if not await is_partitioned(connection):
+                    print("meme is not partitioned, nothing to check.")
+                    return 1
+                return 0 if await check_pruning(connection, *targets[0]) else 1
+
+            print(f"meme partitioned: {await is_partitioned(connection)}")
+            await benchmark(connection, targets)
+            return 0
+    finally:
+        await database.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,238 @@
+"""Benchmark tag filtered meme pages and check they use the tags GIN index.
+
+    python -m scripts.bench_meme_tags --seed --users 20 --memes 20000
+    python -m scripts.bench_meme_tags --max-ms 10
+
+Every statement is built by `paginate_memes`, as the list endpoints do, for
+one to three tags that must all match, first pages and keyset pages. Exits
+non-zero when a p95 exceeds `--max-ms` or the plan of a query for several
+tags does not use `ix_meme_tags` (or the index of a partition attached to it).
+
+Settings are read from the environment like the app. `--seed` replaces the
+users it created on a previous run; it never touches other data.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import Executable, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.api.endpoints.memes import paginate_memes
+from src.api.models import Meme
+from src.core import database
+
+BENCH_EMAIL_DOMAIN = "tags.bench.invalid"
+TAG_INDEX = "ix_meme_tags"
+PAGE_SIZE = 10
+
+
+def tag_statements(
+    owner_id: str, tags: list[str], after_id: int
+) -> dict[str, Executable]:
+    """The tag filtered pages of the public memes of a user."""
+    query = select(Meme).where(Meme.owner_id == owner_id, Meme.visibility.is_(True))
+    return {
+        "first page": paginate_memes(query, tags, None, 1, PAGE_SIZE),
+        "keyset page": paginate_memes(query, tags, after_id, 1, PAGE_SIZE),
+    }
+
+
+def used_indexes(plan: dict) -> set[str]:
+    indexes = set()
+    if "Index Name" in plan:
+        indexes.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        indexes |= used_indexes(child)
+    return indexes
+
+
+async def seed(connection: AsyncConnection, users: int, memes: int, tags: int) -> None:
+    await connection.execute(
+        text('DELETE FROM "user" WHERE email LIKE :pattern'),
+        {"pattern": f"%@{BENCH_EMAIL_DOMAIN}"},
+    )
+    await connection.execute(
+        text(
+            """
+            INSERT INTO "user" (user_id, email, hashed_password)
+            SELECT gen_random_uuid(), 'user' || i || '@' || :domain, 'x'
+            FROM generate_series(1, :users) AS i
+            """
+        ),
+        {"users": users, "domain": BENCH_EMAIL_DOMAIN},
+    )
+    # One to four tags per meme, skewed so a few tags are common and most
+    # are rare, like real tagging.
+    await connection.execute(
+        text(
+            """
+            INSERT INTO meme (description, image_url, visibility, owner_id, tags)
+            SELECT 'meme ' || i, 'bench/' || u.user_id || '/' || i, i % 4 <> 0,
+                u.user_id,
+                ARRAY(
+                    SELECT DISTINCT 'tag' || floor(:tags * random() ^ 2)::int
+                    FROM generate_series(1, 1 + i % 4)
+                )
+            FROM "user" AS u, generate_series(1, :memes) AS i
+            WHERE u.email LIKE :pattern
+            """
+        ),
+        {"memes": memes, "tags": tags, "pattern": f"%@{BENCH_EMAIL_DOMAIN}"},
+    )
+    await connection.execute(
+        text(
+            """
+            UPDATE "user" SET meme_count = :memes,
+                public_meme_count = :memes - :memes / 4
+            WHERE email LIKE :pattern
+            """
+        ),
+        {"memes": memes, "pattern": f"%@{BENCH_EMAIL_DOMAIN}"},
+    )
+    await connection.commit()
+    # Also merges the GIN pending list filled by the bulk insert into the
+    # index, as autovacuum would. Scanning a full pending list adds ~10 ms
+    # to every tag query.
+    await connection.execution_options(isolation_level="AUTOCOMMIT")
+    await connection.execute(text('VACUUM (ANALYZE) "user", meme'))
+
+
+async def sample_targets(
+    connection: AsyncConnection, count: int
+) -> list[tuple[str, list[str], int]]:
+    """(owner_id, tags, after_id) of tag combinations found on public memes."""
+    result = await connection.execute(
+        text(
+            """
+            SELECT m.owner_id::text, m.tags, m.id FROM meme AS m
+            JOIN "user" AS u ON u.user_id = m.owner_id
+            WHERE u.email LIKE :pattern AND m.visibility
+                AND cardinality(m.tags) > 0
+            ORDER BY random() LIMIT :count
+            """
+        ),
+        {"pattern": f"%@{BENCH_EMAIL_DOMAIN}", "count": count},
+    )
+    targets = []
+    for owner_id, tags, meme_id in result:
+        tags = random.sample(tags, random.randint(1, min(3, len(tags))))
+        # Page from somewhere before the sampled meme, so it is on the page.
+        targets.append((owner_id, tags, max(meme_id - 1000, 0)))
+    return targets
+
+
+async def tag_index_names(connection: AsyncConnection) -> set[str]:
+    """The tags index and the indexes of the partitions attached to it."""
+    result = await connection.execute(
+        text(
+            """
+            SELECT CAST(:index AS text)
+            UNION ALL
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(:index)
+            """
+        ),
+        {"index": TAG_INDEX},
+    )
+    return set(result.scalars())
+
+
+async def explain(connection: AsyncConnection, statement: Executable) -> list:
+    """EXPLAIN the statement as the driver sends it, with its bind casts.
+
+    Rendered with literal binds, the tags array would lose the varchar cast
+    the `@>` operator needs.
+    """
+    compiled = statement.compile(dialect=connection.dialect)
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled.string}",
+        tuple(compiled.params[name] for name in compiled.positiontup),
+    )
+    plan = result.scalar()
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+async def check_index(
+    connection: AsyncConnection, targets: list[tuple[str, list[str], int]]
+) -> bool:
+    """Whether every plan of a multi-tag target uses the tags index.
+
+    A single common tag is rightly served by walking the primary key in id
+    order until a page is filled, only AND queries are expected to need it.
+    """
+    tag_indexes = await tag_index_names(connection)
+    checked = missed = 0
+    for target in targets:
+        if len(target[1]) < 2:
+            continue
+        for name, statement in tag_statements(*target).items():
+            plan = await explain(connection, statement)
+            indexes = used_indexes(plan[0]["Plan"])
+            checked += 1
+            if not indexes & tag_indexes:
+                missed += 1
+                print(f"{name} of {target[1]} does not use {TAG_INDEX}: {indexes}")
+    print(f"{TAG_INDEX} used by {checked - missed}/{checked} multi-tag plans")
+    return checked > 0 and missed == 0
+
+
+async def benchmark(
+    connection: AsyncConnection, targets: list[tuple[str, list[str], int]]
+) -> dict[str, float]:
+    """Print the latencies per statement and tag count, return the p95s."""
+    timings: dict[str, list[float]] = {}
+    for target in targets:
+        for name, statement in tag_statements(*target).items():
+            started = time.perf_counter()
+            await connection.execute(statement)
+            elapsed = (time.perf_counter() - started) * 1000
+            timings.setdefault(f"{name}, {len(target[1])} tags", []).append(elapsed)
+    p95s = {}
+    for name, samples in sorted(timings.items()):
+        samples.sort()
+        p95s[name] = samples[max(int(len(samples) * 0.95) - 1, 0)]
+        print(
+            f"{name:>20}: p50 {statistics.median(samples):.3f} ms, "
+            f"p95 {p95s[name]:.3f} ms, n={len(samples)}"
+        )
+    return p95s
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--memes", type=int, default=20_000, help="memes per user")
+    parser.add_argument("--tags", type=int, default=500, help="distinct tags")
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--explain", type=int, default=50, help="targets to EXPLAIN")
+    parser.add_argument("--max-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    try:
+        async with database.get_async_engine().connect() as connection:
+            if args.seed:
+                await seed(connection, args.users, args.memes, args.tags)
+            targets = await sample_targets(connection, args.samples)
+            if not targets:
+                print("No benchmark data, run with --seed first.")
+                return 1
+
+            failed = not await check_index(connection, targets[: args.explain])
+            p95s = await benchmark(connection, targets)
+            if slow := [name for name, p95 in p95s.items() if p95 > args.max_ms]:
+                print(f"Over the {args.max_ms} ms p95 budget: {', '.join(slow)}")
+                failed = True
+            return 1 if failed else 0
+    finally:
+        await database.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
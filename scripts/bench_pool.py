@@ -0,0 +1,128 @@
+"""Benchmark request throughput against the database pool size.
+
+Sweeps pool_size/max_overflow with a fixed number of concurrent requests,
+each checking out a session and running one query like the API does:
+
+    python -m scripts.bench_pool --concurrency 64 --pools 5:10 10:20 20:40
+    python -m scripts.bench_pool --query-ms 5 --duration 20
+
+Settings are read from the environment like the app, every pool gets a
+fresh engine built by `new_async_engine`. `--query-ms` adds server side
+time to the query (pg_sleep) to model slower statements.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from src.config import get_settings
+from src.core import database
+
+QUERY = "SELECT id, owner_id FROM meme ORDER BY id DESC LIMIT 10"
+
+
+def parse_pool(value: str) -> tuple[int, int]:
+    pool_size, _, max_overflow = value.partition(":")
+    return int(pool_size), int(max_overflow or 0)
+
+
+def percentile(timings: list[float], fraction: float) -> float:
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+async def request(sessionmaker: async_sessionmaker, query_ms: float) -> None:
+    async with sessionmaker() as session:
+        if query_ms:
+            await session.execute(
+                text("SELECT pg_sleep(:secs)"), {"secs": query_ms / 1000}
+            )
+        await session.execute(text(QUERY))
+
+
+async def load(
+    engine: AsyncEngine, concurrency: int, duration: float, query_ms: float
+) -> tuple[list[float], int]:
+    """Run `concurrency` request loops for `duration` seconds."""
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    timings: list[float] = []
+    timeouts = 0
+    deadline = time.perf_counter() + duration
+
+    async def loop() -> None:
+        nonlocal timeouts
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                await request(sessionmaker, query_ms)
+            except PoolTimeoutError:
+                timeouts += 1
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return sorted(timings), timeouts
+
+
+async def benchmark(
+    pool_size: int, max_overflow: int, args: argparse.Namespace
+) -> None:
+    settings = get_settings()
+    engine = database.new_async_engine(
+        settings.sqlalchemy_database_uri,
+        settings.database.model_copy(
+            update={"pool_size": pool_size, "max_overflow": max_overflow}
+        ),
+    )
+    try:
+        await database.warm_up_engine(engine, pool_size)
+        # Warm the server's and the statement caches outside the measurement.
+        await load(engine, args.concurrency, 1.0, args.query_ms)
+        timings, timeouts = await load(
+            engine, args.concurrency, args.duration, args.query_ms
+        )
+    finally:
+        await engine.dispose()
+
+    if not timings:
+        print(f"{pool_size:>5}:{max_overflow:<5} no request completed")
+        return
+    print(
+        f"{pool_size:>5}:{max_overflow:<5} "
+        f"{len(timings) / args.duration:>9.0f} req/s  "
+        f"p50 {statistics.median(timings):7.2f} ms  "
+        f"p99 {percentile(timings, 0.99):7.2f} ms  "
+        f"pool timeouts {timeouts}"
+    )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pools",
+        nargs="+",
+        type=parse_pool,
+        default=[(5, 10), (10, 20), (20, 40), (40, 80)],
+        help="pool_size:max_overflow pairs",
+    )
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--query-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(
+        f"concurrency {args.concurrency}, {args.duration:.0f} s per pool, "
+        f"query-ms {args.query_ms}"
+    )
+    print(" pool:overflow  throughput     latency")
+    for pool_size, max_overflow in args.pools:
+        await benchmark(pool_size, max_overflow, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,153 @@
+"""Measure how long the app takes from process start to serving requests.
+
+    python -m scripts.bench_startup --runs 5 --max-secs 10 --max-import-secs 2.5
+
+Every run starts `gunicorn` with the repo configuration on a free local port
+and polls `/health/ready` until it answers 200, so the time covers the
+interpreter, the imports, forking the workers and the readiness warm-up
+against the configured database and storage. The app is also imported once
+more with `-X importtime` to show where the import time goes.
+
+Exits non-zero when the median time to ready exceeds `--max-secs`, the
+median import exceeds `--max-import-secs`, or a module that is meant to load
+lazily (numpy, PIL) is imported with the app.
+"""
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from src.config import PROJECT_DIR
+
+# Only needed by the image hash index and the worker processes.
+DEFERRED_MODULES = ("numpy", "PIL")
+
+
+def measure_import() -> dict[str, int]:
+    """Cumulative import time in microseconds of every module imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=PROJECT_DIR,
+        env={**os.environ, "PYTHONPATH": str(PROJECT_DIR)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def deferred_imports(modules: dict[str, int]) -> list[str]:
+    return sorted(name for name in modules if name.split(".")[0] in DEFERRED_MODULES)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def is_ready(url: str) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def measure_ready(workers: int = 1, timeout_secs: float = 60.0) -> float:
+    """Seconds from starting the server process to its first ready response."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/health/ready"
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(PROJECT_DIR),
+        "SERVER__BIND": f"127.0.0.1:{port}",
+        "SERVER__WORKERS": str(workers),
+    }
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "src.main:app"],
+        cwd=PROJECT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        while not is_ready(url):
+            if process.poll() is not None:
+                raise RuntimeError(
+                    f"Server exited with {process.returncode}:\n{process.stderr.read()}"
+                )
+            if time.perf_counter() - started > timeout_secs:
+                raise TimeoutError(f"{url} not ready after {timeout_secs} s.")
+            time.sleep(0.05)
+        return time.perf_counter() - started
+    finally:
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        process.stderr.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--timeout-secs", type=float, default=60.0)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-secs", type=float)
+    parser.add_argument("--max-import-secs", type=float)
+    args = parser.parse_args()
+
+    ready = [measure_ready(args.workers, args.timeout_secs) for _ in range(args.runs)]
+    ready_median = statistics.median(ready)
+    print(
+        f"start to ready: median {ready_median:.3f} s, max {max(ready):.3f} s, "
+        f"n={args.runs}, workers={args.workers}"
+    )
+
+    runs = [measure_import() for _ in range(args.runs)]
+    median = statistics.median(run["src.main"] for run in runs) / 1e6
+    print(f"import src.main: median {median:.3f} s, n={args.runs}")
+    top_level = {
+        name: cumulative
+        for name, cumulative in runs[-1].items()
+        if "." not in name and name != "src"
+    }
+    for name, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[
+        : args.top
+    ]:
+        print(f"{cumulative / 1e6:>8.3f} s  {name}")
+
+    failed = False
+    if deferred := deferred_imports(runs[-1]):
+        print(f"Imported with the app but meant to be lazy: {', '.join(deferred)}")
+        failed = True
+    if args.max_secs is not None and ready_median > args.max_secs:
+        print(f"Median time to ready is over the {args.max_secs} s budget.")
+        failed = True
+    if args.max_import_secs is not None and median > args.max_import_secs:
+        print(f"Median import time is over the {args.max_import_secs} s budget.")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,7 @@ REFRESH_TOKEN_NOT_FOUND = "Refresh token not found."
 REFRESH_TOKEN_EXPIRED = "Refresh token expired."
 REFRESH_TOKEN_ALREADY_USED = "Refresh token already used."
 EMAIL_ADDRESS_ALREADY_USED = "Cannot use this email address."
+RATE_LIMITED = "Too many requests, retry later."
 
 ACCESS_TOKEN_RESPONSES: dict[int | str, dict[str, Any]] = {
     400: {
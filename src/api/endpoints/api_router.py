@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from . import api_messages, auth, users, memes
+from . import api_messages, auth, events, follows, health, images, users, memes
 
 
 auth_router = APIRouter()
@@ -35,3 +35,15 @@ users_router.include_router(users.router, prefix="/users", tags=["users"])
 
 meme_router = APIRouter()
 meme_router.include_router(memes.router, tags=["memes"])
+
+follow_router = APIRouter()
+follow_router.include_router(follows.router, tags=["timeline"])
+
+event_router = APIRouter()
+event_router.include_router(events.router, prefix="/events", tags=["events"])
+
+image_router = APIRouter()
+image_router.include_router(images.router, tags=["images"])
+
+health_router = APIRouter()
+health_router.include_router(health.router, prefix="/health", tags=["health"])
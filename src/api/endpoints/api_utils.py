@@ -1,12 +1,15 @@
-from collections.abc import AsyncGenerator
+import math
+from collections.abc import AsyncGenerator, Awaitable, Callable
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import get_settings
 from src.core import database
+from src.core.rate_limit import RouteLimiter, get_route_limiter
 from src.core.security.jwt import verify_jwt_token
 from src.api.models import User
 from . import api_messages
@@ -19,13 +22,30 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_read_session(
+    session: AsyncSession = Depends(get_session),
+) -> AsyncGenerator[AsyncSession, None]:
+    if not database.has_replicas():
+        yield session
+        return
+
+    async with database.get_async_read_session() as read_session:
+        yield read_session
+
+
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ) -> User:
     token_payload = verify_jwt_token(token)
 
     user = await session.scalar(select(User).where(User.user_id == token_payload.sub))
+    if user is None and database.has_replicas():
+        # A freshly registered user may not have reached the replica yet.
+        async with database.get_async_session() as primary_session:
+            user = await primary_session.scalar(
+                select(User).where(User.user_id == token_payload.sub)
+            )
 
     if user is None:
         raise HTTPException(
@@ -33,3 +53,67 @@ async def get_current_user(
             detail=api_messages.JWT_ERROR_USER_REMOVED,
         )
     return user
+
+
+def get_client_key(request: Request) -> str:
+    """Rate limit key, the token subject when authenticated, else the client IP.
+
+    Behind a load balancer the client IP comes from X-Forwarded-For, which is
+    only trusted from `server.forwarded_allow_ips`.
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{verify_jwt_token(token).sub}"
+        except HTTPException:
+            pass
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+async def admit(route: str, request: Request) -> RouteLimiter | None:
+    """Take a token and a concurrency slot, the caller releases the slot.
+
+    Returns None when the route is not limited.
+    """
+    settings = get_settings().rate_limits
+    if not settings.enabled or route not in settings.routes:
+        return None
+
+    limiter = get_route_limiter(route)
+    retry_after = await limiter.take(get_client_key(request))
+    if retry_after is None and not await limiter.acquire():
+        retry_after = settings.max_wait_secs
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=api_messages.RATE_LIMITED,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    return limiter
+
+
+def rate_limit(route: str) -> Callable[[Request], AsyncGenerator[None, None]]:
+    async def limit(request: Request) -> AsyncGenerator[None, None]:
+        limiter = await admit(route, request)
+        try:
+            yield
+        finally:
+            if limiter is not None:
+                limiter.release()
+
+    return limit
+
+
+def rate_limit_stream(
+    route: str,
+) -> Callable[[Request], Awaitable[RouteLimiter | None]]:
+    """Like `rate_limit` for streaming responses.
+
+    Dependencies are cleaned up before a streaming body is sent, so the slot
+    is handed to the body, which releases it once done.
+    """
+
+    async def limit(request: Request) -> RouteLimiter | None:
+        return await admit(route, request)
+
+    return limit
@@ -10,7 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import get_settings
 from src.core.security.jwt import create_jwt_token
 from src.core.security.password import (
-    DUMMY_PASSWORD,
+    get_dummy_password_hash,
     get_password_hash,
     verify_password,
 )
@@ -27,6 +27,7 @@ router = APIRouter()
     response_model=AccessTokenResponse,
     responses=api_messages.ACCESS_TOKEN_RESPONSES,
     description="OAuth2 compatible token, get an access token for future requests using username and password.",
+    dependencies=[Depends(api_utils.rate_limit("login"))],
 )
 async def login_access_token(
     session: AsyncSession = Depends(api_utils.get_session),
@@ -35,7 +36,7 @@ async def login_access_token(
     user = await session.scalar(select(User).where(User.email == form_data.username))
 
     if user is None:
-        verify_password(form_data.password, DUMMY_PASSWORD)
+        verify_password(form_data.password, get_dummy_password_hash())
 
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -124,6 +125,7 @@ async def refresh_token(
     response_model=UserResponse,
     description="Create new user",
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(api_utils.rate_limit("register"))],
 )
 async def register_new_user(
     new_user: UserCreateRequest,
@@ -0,0 +1,68 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.models import User
+from src.config import get_settings
+from src.core.events import BROADCASTER, GLOBAL_TOPIC
+from . import api_utils
+
+router = APIRouter()
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def stream_events(topic: str) -> AsyncIterator[bytes]:
+    heartbeat_secs = get_settings().events.heartbeat_secs
+    subscriber = BROADCASTER.subscribe(topic)
+    try:
+        yield b": connected\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), heartbeat_secs)
+            except asyncio.TimeoutError:
+                yield b": heartbeat\n\n"
+                continue
+            if event is None:
+                # The client fell too far behind and has to reconnect.
+                return
+            yield event
+    finally:
+        BROADCASTER.unsubscribe(topic, subscriber)
+
+
+@router.get(
+    "/memes",
+    response_class=StreamingResponse,
+    description="Server-sent events for every new public meme.",
+)
+async def stream_new_memes() -> StreamingResponse:
+    return StreamingResponse(
+        stream_events(GLOBAL_TOPIC),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.get(
+    "/users/{user_id}/memes",
+    response_class=StreamingResponse,
+    description="Server-sent events for new public memes of a user.",
+)
+async def stream_new_memes_of_user(
+    user_id: str,
+    session: AsyncSession = Depends(api_utils.get_read_session),
+) -> StreamingResponse:
+    user = await session.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
+        )
+    return StreamingResponse(
+        stream_events(f"user:{user_id}"),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -0,0 +1,124 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.models import Follow, TimelineEntry, User
+from src.api.schemas.responses import MemeResponse
+from src.config import get_settings
+from src.core.jobs import backfill_timelines
+from src.core.s3 import get_image_urls
+from src.core.timeline import backfill_timeline, home_timeline, stopped_pulling
+from . import api_utils
+
+router = APIRouter()
+
+
+@router.put(
+    "/users/{user_id}/follow",
+    status_code=status.HTTP_204_NO_CONTENT,
+    description="Follow a user, adding their public memes to the home timeline.",
+)
+async def follow_user(
+    user_id: str,
+    current_user: User = Depends(api_utils.get_current_user),
+    session: AsyncSession = Depends(api_utils.get_session),
+) -> None:
+    if user_id == current_user.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot follow yourself."
+        )
+    followee = await session.get(User, user_id)
+    if not followee:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
+        )
+
+    followed = (
+        insert(Follow)
+        .values(follower_id=current_user.user_id, followee_id=user_id)
+        .on_conflict_do_nothing()
+        .returning(Follow.followee_id)
+        .cte("followed")
+    )
+    await session.execute(
+        update(User)
+        .where(User.user_id.in_(select(followed.c.followee_id)))
+        .values(follower_count=User.follower_count + 1)
+    )
+    if followee.follower_count < get_settings().timeline.fan_out_max_followers:
+        await session.execute(backfill_timeline(current_user.user_id, user_id))
+    await session.commit()
+
+
+@router.delete(
+    "/users/{user_id}/follow",
+    status_code=status.HTTP_204_NO_CONTENT,
+    description="Unfollow a user and drop their memes from the home timeline.",
+)
+async def unfollow_user(
+    user_id: str,
+    current_user: User = Depends(api_utils.get_current_user),
+    session: AsyncSession = Depends(api_utils.get_session),
+) -> None:
+    unfollowed = (
+        delete(Follow)
+        .where(
+            Follow.follower_id == current_user.user_id, Follow.followee_id == user_id
+        )
+        .returning(Follow.followee_id)
+        .cte("unfollowed")
+    )
+    followee = (
+        update(User)
+        .where(User.user_id.in_(select(unfollowed.c.followee_id)))
+        .values(follower_count=User.follower_count - 1)
+        .returning(User.user_id, User.follower_count)
+        .cte("followee")
+    )
+    backfill = backfill_timelines(
+        select(followee.c.user_id)
+        .where(
+            stopped_pulling(followee.c.follower_count + 1, followee.c.follower_count)
+        )
+        .subquery()
+    ).cte("backfill")
+    await session.execute(select(followee.c.user_id).add_cte(backfill))
+    await session.execute(
+        delete(TimelineEntry).where(
+            TimelineEntry.user_id == current_user.user_id,
+            TimelineEntry.meme_owner_id == user_id,
+        )
+    )
+    await session.commit()
+
+
+@router.get(
+    "/me/timeline",
+    response_model=list[MemeResponse],
+    description="Get the newest public memes of followed users, page with `before_id`.",
+)
+async def get_home_timeline(
+    current_user: User = Depends(api_utils.get_current_user),
+    session: AsyncSession = Depends(api_utils.get_read_session),
+    before_id: int | None = Query(None),
+    page_size: int = Query(10, ge=1, le=100),
+) -> list[MemeResponse]:
+    result = await session.execute(
+        home_timeline(current_user.user_id, before_id, page_size)
+    )
+    memes = result.scalars().all()
+    image_urls = await get_image_urls([meme.image_url for meme in memes])
+
+    return [
+        MemeResponse(
+            id=meme.id,
+            description=meme.description,
+            image_url=image_url,
+            visibility=meme.visibility,
+            owner_id=meme.owner_id,
+            view_count=meme.view_count,
+            tags=meme.tags,
+        )
+        for meme, image_url in zip(memes, image_urls)
+    ]
@@ -0,0 +1,96 @@
+import os
+
+from fastapi import APIRouter, Response, status
+
+from src.api.schemas.responses import (
+    JobKindMetricsResponse,
+    JobMetricsResponse,
+    LivenessResponse,
+    RateLimitMetricsResponse,
+    ReadinessResponse,
+    RouteMetricsResponse,
+    WorkerHealthResponse,
+)
+from src.config import get_settings
+from src.core.jobs import JOB_RUNNER
+from src.core.rate_limit import get_metrics
+from src.core.readiness import READINESS
+from src.core.worker import get_rss_bytes, get_uptime_secs
+
+router = APIRouter()
+
+
+@router.get(
+    "/live",
+    response_model=LivenessResponse,
+    description="Liveness probe, answers without touching any dependency.",
+)
+async def get_liveness() -> LivenessResponse:
+    return LivenessResponse()
+
+
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessResponse}},
+    description="Readiness probe, 503 until the database and storage both answered "
+    "the warm-up or while the database is unreachable, with the latest cached "
+    "dependency latencies. Later storage failures are reported but keep the pod "
+    "ready.",
+)
+async def get_readiness(response: Response) -> ReadinessResponse:
+    if not READINESS.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessResponse.model_validate(READINESS, from_attributes=True)
+
+
+@router.get(
+    "/worker",
+    response_model=WorkerHealthResponse,
+    description="Report the health of the worker process serving the request.",
+)
+async def get_worker_health() -> WorkerHealthResponse:
+    memory_limit_mb = get_settings().server.max_worker_memory_mb
+    return WorkerHealthResponse(
+        pid=os.getpid(),
+        uptime_secs=get_uptime_secs(),
+        rss_bytes=get_rss_bytes(),
+        memory_limit_bytes=(
+            memory_limit_mb * 1024 * 1024 if memory_limit_mb is not None else None
+        ),
+    )
+
+
+@router.get(
+    "/rate-limits",
+    response_model=RateLimitMetricsResponse,
+    description="Report the rate limiter counters of the worker serving the request.",
+)
+async def get_rate_limit_metrics() -> RateLimitMetricsResponse:
+    return RateLimitMetricsResponse(
+        pid=os.getpid(),
+        backend=get_settings().rate_limits.backend,
+        routes={
+            route: RouteMetricsResponse.model_validate(metrics, from_attributes=True)
+            for route, metrics in get_metrics().items()
+        },
+    )
+
+
+@router.get(
+    "/jobs",
+    response_model=JobMetricsResponse,
+    description="Report the background job counters of the worker serving the request.",
+)
+async def get_job_metrics() -> JobMetricsResponse:
+    uptime_secs = get_uptime_secs()
+    return JobMetricsResponse(
+        pid=os.getpid(),
+        uptime_secs=uptime_secs,
+        kinds={
+            kind: JobKindMetricsResponse(
+                **metrics.model_dump(), per_sec=metrics.succeeded / uptime_secs
+            )
+            for kind, metrics in JOB_RUNNER.metrics.items()
+        },
+    )
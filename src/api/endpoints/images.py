@@ -0,0 +1,175 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import anyio
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.models import Meme
+from src.config import get_settings
+from src.core.image_cache import (
+    CachedImage,
+    DiskLRUCache,
+    get_image_cache,
+    read_file_chunks,
+)
+from src.core.s3 import get_image_stream
+from . import api_utils
+
+router = APIRouter()
+
+
+def parse_range(range_header: str | None, size: int) -> tuple[int, int] | None:
+    if range_header is None or not range_header.startswith("bytes="):
+        return None
+
+    spec = range_header.removeprefix("bytes=").strip()
+    if "," in spec or "-" not in spec:
+        # Multiple or malformed ranges are ignored and the full body is served.
+        return None
+
+    start_str, end_str = spec.split("-", 1)
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            start = size - int(end_str)
+            end = size - 1
+    except ValueError:
+        return None
+
+    start = max(start, 0)
+    end = min(end, size - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable.",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"public, max-age={get_settings().image_cache.max_age_secs}",
+    }
+
+
+async def cached_image_response(
+    image: CachedImage, range_header: str | None, if_none_match: str | None
+) -> Response:
+    headers = cache_headers(image.etag)
+    if etag_matches(if_none_match, image.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = parse_range(range_header, image.size)
+    status_code = status.HTTP_200_OK
+    start, end = 0, image.size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{image.size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    file = await anyio.open_file(image.path, "rb")
+    return StreamingResponse(
+        read_file_chunks(file, start, end, get_settings().image_cache.chunk_size),
+        status_code=status_code,
+        headers=headers,
+        media_type=image.content_type,
+    )
+
+
+async def tee_to_cache(
+    chunks: AsyncIterator[bytes],
+    cache: DiskLRUCache,
+    image_path: str,
+    etag: str,
+    content_type: str,
+) -> AsyncIterator[bytes]:
+    temp_path = cache.new_temp_path()
+    completed = False
+    try:
+        async with await anyio.open_file(temp_path, "wb") as file:
+            async for chunk in chunks:
+                await file.write(chunk)
+                yield chunk
+        completed = True
+    finally:
+        # The response is cancelled when the client goes away, the temp file
+        # still has to be moved into the cache or removed.
+        with anyio.CancelScope(shield=True):
+            if completed:
+                await cache.put(image_path, temp_path, etag, content_type)
+            else:
+                await asyncio.to_thread(temp_path.unlink, missing_ok=True)
+
+
+async def proxied_image_response(
+    image_path: str, range_header: str | None, if_none_match: str | None
+) -> Response:
+    settings = get_settings().image_cache
+    s3_object, chunks = await get_image_stream(image_path, range_header, if_none_match)
+
+    etag = s3_object["ETag"]
+    content_type = s3_object.get("ContentType", "application/octet-stream")
+    headers = cache_headers(etag)
+    headers["Content-Length"] = str(s3_object["ContentLength"])
+
+    if "ContentRange" in s3_object:
+        headers["Content-Range"] = s3_object["ContentRange"]
+        return StreamingResponse(
+            chunks,
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            headers=headers,
+            media_type=content_type,
+        )
+
+    if s3_object["ContentLength"] <= settings.max_object_size_bytes:
+        chunks = tee_to_cache(chunks, get_image_cache(), image_path, etag, content_type)
+    return StreamingResponse(chunks, headers=headers, media_type=content_type)
+
+
+@router.get(
+    "/users/{user_id}/memes/{meme_id}/image",
+    response_class=StreamingResponse,
+    description="Stream the image of a specific public meme, honouring `Range` and `If-None-Match`.",
+)
+async def get_public_meme_image(
+    user_id: str,
+    meme_id: int,
+    session: AsyncSession = Depends(api_utils.get_read_session),
+    range_header: str | None = Header(None, alias="Range"),
+    if_none_match: str | None = Header(None),
+) -> Response:
+    image_path = await session.scalar(
+        select(Meme.image_url).where(
+            Meme.id == meme_id, Meme.owner_id == user_id, Meme.visibility.is_(True)
+        )
+    )
+    if image_path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Meme not found or not public.",
+        )
+
+    cached = get_image_cache().get(image_path)
+    if cached is not None:
+        try:
+            return await cached_image_response(cached, range_header, if_none_match)
+        except FileNotFoundError:
+            # Removed from disk since the lookup, serve it from storage.
+            await get_image_cache().discard(image_path)
+    return await proxied_image_response(image_path, range_header, if_none_match)
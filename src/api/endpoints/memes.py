@@ -1,64 +1,320 @@
+import time
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
     Depends,
     File,
     Form,
     HTTPException,
     Query,
+    Response,
     UploadFile,
     status,
 )
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Integer, Select, cast, delete, insert, literal, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from src.api.models import User, Meme
-from src.api.schemas.responses import MemeResponse
+from sqlalchemy.orm import aliased
+from src.api.models import Job, User, Meme
+from src.api.schemas.requests import MemeUploadConfirmRequest, MemeUploadRequest
+from src.api.schemas.responses import MemeResponse, MemeUploadResponse
 from src.api.endpoints import api_utils
-from src.core.s3 import get_image_url, upload_image, delete_image
+from src.config import get_settings
+from src.core import database
+from src.core.counters import VIEW_COUNTER
+from src.core.rate_limit import RouteLimiter
+from src.core.response_cache import get_public_meme_cache
+from src.core.image_hash import compute_image_hash, find_duplicate, get_hash_index
+from src.core.image_variants import delete_variants, generate_variants, select_variant
+from src.core.jobs import (
+    DELETE_MEME_IMAGES,
+    DELETE_UNCONFIRMED_UPLOAD,
+    cleanup_images,
+    enqueue,
+    fan_out_memes,
+    image_cleanup_key,
+)
+from src.core.s3 import (
+    copy_image,
+    create_upload_policy,
+    delete_image,
+    download_image,
+    get_image_url,
+    get_image_urls,
+    head_image,
+    new_image_path,
+    upload_image,
+)
 
 router = APIRouter()
 
+TOTAL_COUNT_HEADER = "X-Total-Count"
+EXPORT_BATCH_SIZE = 500
+MAX_PAGE_SIZE = 100
+MAX_TAGS = 10
+MAX_TAG_LENGTH = 64
+UPLOAD_CLEANUP_SLACK = timedelta(minutes=5)
+
+
+def insert_meme(**values: object) -> Select:
+    """INSERT a meme, bump its owner's counters and queue its fan-out in one
+    statement."""
+    columns = Meme.__table__.c
+    inserted = (
+        insert(Meme)
+        .from_select(
+            list(values),
+            select(
+                *(literal(value, columns[key].type) for key, value in values.items())
+            ),
+            # Only one INSERT of a statement gets its Python side defaults
+            # bound, the server defaults apply instead.
+            include_defaults=False,
+        )
+        .returning(*columns)
+        .cte("inserted")
+    )
+    fan_out = fan_out_memes(inserted).cte("fan_out")
+    counter = (
+        update(User)
+        .where(User.user_id == inserted.c.owner_id)
+        .values(
+            meme_count=User.meme_count + 1,
+            public_meme_count=User.public_meme_count
+            + cast(inserted.c.visibility, Integer),
+        )
+        .cte("counter")
+    )
+    return select(aliased(Meme, inserted)).add_cte(counter, fan_out)
+
+
+def normalize_tags(tags: list[str]) -> list[str]:
+    normalized = list(dict.fromkeys(tag.strip().lower() for tag in tags if tag.strip()))
+    if len(normalized) > MAX_TAGS or any(
+        len(tag) > MAX_TAG_LENGTH for tag in normalized
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_TAGS} tags of up to {MAX_TAG_LENGTH} characters.",
+        )
+    return normalized
+
+
+def reject_duplicate(image_hash: int | None, exclude_id: int | None = None) -> None:
+    if find_duplicate(image_hash, exclude_id) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A near-duplicate meme already exists.",
+        )
+
+
+async def hash_upload(image: UploadFile, exclude_id: int | None = None) -> int | None:
+    if not get_settings().image_hash.enabled:
+        return None
+    image_hash = await compute_image_hash(await image.read())
+    await image.seek(0)
+    reject_duplicate(image_hash, exclude_id)
+    return image_hash
+
+
+def index_meme(meme: Meme) -> None:
+    if not get_settings().image_hash.enabled:
+        return
+    get_hash_index().discard(meme.id)
+    if meme.visibility and meme.phash is not None:
+        get_hash_index().add(meme.id, meme.phash)
+
+
+def paginate_memes(
+    query: Select,
+    tags: list[str],
+    after_id: int | None,
+    page: int,
+    page_size: int,
+) -> Select:
+    """Filter by tags (all must match) and page by id.
+
+    `after_id` pages by keyset over (owner_id, id) and should be preferred
+    over `page`, whose OFFSET cost grows with depth.
+    """
+    query = query.order_by(Meme.id).limit(page_size)
+    if tags:
+        query = query.where(Meme.tags.contains(normalize_tags(tags)))
+    if after_id is not None:
+        return query.where(Meme.id > after_id)
+    return query.offset((page - 1) * page_size)
+
+
+async def store_meme_variants(meme_id: int, owner_id: str, image_path: str) -> None:
+    try:
+        variants = await generate_variants(image_path)
+    except Exception as e:
+        print(f"Error generating variants for meme {meme_id}: {e}")
+        return
+
+    async with database.get_async_session() as session:
+        result = await session.execute(
+            update(Meme)
+            .where(
+                Meme.id == meme_id,
+                Meme.owner_id == owner_id,
+                Meme.image_url == image_path,
+            )
+            .values(variants=variants)
+        )
+        await session.commit()
+
+    if result.rowcount == 0:
+        # The meme was deleted or its image replaced while variants were rendered.
+        await delete_variants(variants)
+
+
+def schedule_meme_variants(
+    background_tasks: BackgroundTasks, meme: Meme, image_path: str
+) -> None:
+    if get_settings().image_variants.enabled:
+        background_tasks.add_task(
+            store_meme_variants, meme.id, meme.owner_id, image_path
+        )
+
+
+def record_views(memes: list[Meme | MemeResponse]) -> None:
+    if get_settings().view_counters.enabled:
+        for meme in memes:
+            VIEW_COUNTER.record(meme.id, meme.owner_id)
+
+
+async def get_variant_url(meme: Meme, width: int | None) -> str | None:
+    if width is None:
+        return None
+    variant = select_variant(meme.variants, width)
+    if variant is None:
+        return None
+    return await get_image_url(variant)
+
 
 @router.get(
     "/users/{user_id}/memes",
     response_model=list[MemeResponse],
     description="Get all public memes of a user.",
+    dependencies=[Depends(api_utils.rate_limit("list_memes"))],
 )
 async def get_public_memes_of_user(
     user_id: str,
-    session: AsyncSession = Depends(api_utils.get_session),
+    response: Response,
+    session: AsyncSession = Depends(api_utils.get_read_session),
     page: int = Query(1, ge=1),
-    page_size: int = Query(10, ge=1),
+    page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    width: int | None = Query(None, ge=1),
+    tags: list[str] = Query([], alias="tag"),
+    after_id: int | None = Query(None),
 ) -> list[MemeResponse]:
     user = await session.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
         )
+    if not tags:
+        response.headers[TOTAL_COUNT_HEADER] = str(user.public_meme_count)
 
-    offset = (page - 1) * page_size
     result = await session.execute(
-        select(Meme)
-        .where(Meme.owner_id == user_id, Meme.visibility.is_(True))
-        .offset(offset)
-        .limit(page_size)
+        paginate_memes(
+            select(Meme).where(Meme.owner_id == user_id, Meme.visibility.is_(True)),
+            tags,
+            after_id,
+            page,
+            page_size,
+        )
     )
     memes = result.scalars().all()
+    record_views(memes)
 
-    response = []
+    memes_response = []
     for meme in memes:
         presigned_url = await get_image_url(meme.image_url)
-        response.append(
+        memes_response.append(
             MemeResponse(
                 id=meme.id,
                 description=meme.description,
                 image_url=presigned_url,
                 visibility=meme.visibility,
                 owner_id=meme.owner_id,
+                view_count=meme.view_count,
+                tags=meme.tags,
+                variant_url=await get_variant_url(meme, width),
             )
         )
 
-    return response
+    return memes_response
+
+
+@router.get(
+    "/memes/popular",
+    response_model=list[MemeResponse],
+    description="Get the most viewed public memes.",
+)
+async def get_popular_memes(
+    session: AsyncSession = Depends(api_utils.get_read_session),
+    limit: int = Query(10, ge=1, le=100),
+) -> list[MemeResponse]:
+    result = await session.execute(
+        select(Meme)
+        .where(Meme.visibility.is_(True))
+        .order_by(Meme.view_count.desc(), Meme.id.desc())
+        .limit(limit)
+    )
+    memes = result.scalars().all()
+    image_urls = await get_image_urls([meme.image_url for meme in memes])
+
+    return [
+        MemeResponse(
+            id=meme.id,
+            description=meme.description,
+            image_url=image_url,
+            visibility=meme.visibility,
+            owner_id=meme.owner_id,
+            view_count=meme.view_count,
+            tags=meme.tags,
+        )
+        for meme, image_url in zip(memes, image_urls)
+    ]
+
+
+async def load_public_meme(
+    user_id: str, meme_id: int, cached: bool = False
+) -> MemeResponse | None:
+    """Render a public meme, shared by every request waiting on the cache.
+
+    Loads for the cache read the primary, a lagging replica would put back
+    an edited or deleted meme right after its invalidation for a whole TTL.
+    """
+    get_session = (
+        database.get_async_session if cached else database.get_async_read_session
+    )
+    async with get_session() as session:
+        meme = await session.scalar(
+            select(Meme).where(
+                Meme.id == meme_id,
+                Meme.owner_id == user_id,
+                Meme.visibility.is_(True),
+            )
+        )
+    if meme is None:
+        return None
+    return MemeResponse(
+        id=meme.id,
+        description=meme.description,
+        image_url=await get_image_url(meme.image_url),
+        visibility=meme.visibility,
+        owner_id=meme.owner_id,
+        view_count=meme.view_count,
+        tags=meme.tags,
+    )
 
 
 @router.get(
@@ -69,60 +325,175 @@ async def get_public_memes_of_user(
 async def get_specific_public_meme(
     user_id: str,
     meme_id: int,
-    session: AsyncSession = Depends(api_utils.get_session),
+    session: AsyncSession = Depends(api_utils.get_read_session),
 ) -> MemeResponse:
-    user = await session.get(User, user_id)
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
+    if get_settings().response_cache.enabled:
+        meme = await get_public_meme_cache().get_or_load(
+            (user_id, meme_id), lambda: load_public_meme(user_id, meme_id, cached=True)
         )
+    else:
+        meme = await load_public_meme(user_id, meme_id)
 
-    result = await session.execute(
+    if meme is None:
+        user = await session.get(User, user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
+            )
+        raise HTTPException(status_code=404, detail="Meme not found or not public.")
+    record_views([meme])
+    return meme
+
+
+@router.get(
+    "/users/{user_id}/memes/{meme_id}/similar",
+    response_model=list[MemeResponse],
+    description="Get public memes whose images look like a specific public meme.",
+)
+async def get_similar_public_memes(
+    user_id: str,
+    meme_id: int,
+    session: AsyncSession = Depends(api_utils.get_read_session),
+    limit: int = Query(10, ge=1, le=100),
+) -> list[MemeResponse]:
+    meme = await session.scalar(
         select(Meme).where(
             Meme.id == meme_id, Meme.owner_id == user_id, Meme.visibility.is_(True)
         )
     )
-    meme = result.scalars().first()
     if meme is None:
         raise HTTPException(status_code=404, detail="Meme not found or not public.")
-    meme.image_url = await get_image_url(meme.image_url)
-    return meme
+    if meme.phash is None:
+        return []
+
+    matches = get_hash_index().search(
+        meme.phash, get_settings().image_hash.similar_max_distance, limit + 1
+    )
+    distances = {
+        match_id: distance for match_id, distance in matches if match_id != meme.id
+    }
+    result = await session.execute(
+        select(Meme).where(Meme.id.in_(distances), Meme.visibility.is_(True))
+    )
+    memes = sorted(result.scalars().all(), key=lambda meme: distances[meme.id])[:limit]
+    image_urls = await get_image_urls([meme.image_url for meme in memes])
+
+    return [
+        MemeResponse(
+            id=meme.id,
+            description=meme.description,
+            image_url=image_url,
+            visibility=meme.visibility,
+            owner_id=meme.owner_id,
+            view_count=meme.view_count,
+            tags=meme.tags,
+        )
+        for meme, image_url in zip(memes, image_urls)
+    ]
 
 
 @router.get(
     "/me/memes",
     response_model=list[MemeResponse],
     description="Get all memes of the current user.",
+    dependencies=[Depends(api_utils.rate_limit("list_memes"))],
 )
 async def get_all_memes_of_current_user(
+    response: Response,
     current_user: User = Depends(api_utils.get_current_user),
     session: AsyncSession = Depends(api_utils.get_session),
     page: int = Query(1, ge=1),
-    page_size: int = Query(10, ge=1),
+    page_size: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    width: int | None = Query(None, ge=1),
+    tags: list[str] = Query([], alias="tag"),
+    after_id: int | None = Query(None),
 ) -> list[MemeResponse]:
-    offset = (page - 1) * page_size
+    if not tags:
+        response.headers[TOTAL_COUNT_HEADER] = str(current_user.meme_count)
+
     result = await session.execute(
-        select(Meme)
-        .where(Meme.owner_id == current_user.user_id)
-        .offset(offset)
-        .limit(page_size)
+        paginate_memes(
+            select(Meme).where(Meme.owner_id == current_user.user_id),
+            tags,
+            after_id,
+            page,
+            page_size,
+        )
     )
     memes = result.scalars().all()
 
-    response = []
+    memes_response = []
     for meme in memes:
         presigned_url = await get_image_url(meme.image_url)
-        response.append(
+        memes_response.append(
             MemeResponse(
                 id=meme.id,
                 description=meme.description,
                 image_url=presigned_url,
                 visibility=meme.visibility,
                 owner_id=meme.owner_id,
+                view_count=meme.view_count,
+                tags=meme.tags,
+                variant_url=await get_variant_url(meme, width),
             )
         )
 
-    return response
+    return memes_response
+
+
+async def export_memes(
+    user_id: str, limiter: RouteLimiter | None = None
+) -> AsyncIterator[bytes]:
+    """Yield NDJSON lines, reading rows through a server-side cursor.
+
+    The request's session is closed before a streaming body is sent, so the
+    export opens its own, and holds the rate limiter slot until it is done.
+    It reads from the primary, an export right after an upload must include it.
+    """
+    try:
+        async with database.get_async_session() as session:
+            result = await session.stream_scalars(
+                select(Meme)
+                .where(Meme.owner_id == user_id)
+                .order_by(Meme.id)
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            async for memes in result.partitions():
+                image_urls = await get_image_urls([meme.image_url for meme in memes])
+                yield b"".join(
+                    MemeResponse(
+                        id=meme.id,
+                        description=meme.description,
+                        image_url=image_url,
+                        visibility=meme.visibility,
+                        owner_id=meme.owner_id,
+                        view_count=meme.view_count,
+                        tags=meme.tags,
+                    )
+                    .model_dump_json()
+                    .encode()
+                    + b"\n"
+                    for meme, image_url in zip(memes, image_urls)
+                )
+    finally:
+        if limiter is not None:
+            limiter.release()
+
+
+@router.get(
+    "/me/memes/export",
+    response_class=StreamingResponse,
+    description="Stream all memes of the current user as newline-delimited JSON.",
+)
+async def export_memes_of_current_user(
+    current_user: User = Depends(api_utils.get_current_user),
+    # After authentication, a 401 must not leave the slot taken.
+    limiter: RouteLimiter | None = Depends(api_utils.rate_limit_stream("export")),
+) -> StreamingResponse:
+    return StreamingResponse(
+        export_memes(current_user.user_id, limiter),
+        media_type="application/x-ndjson",
+    )
 
 
 @router.get(
@@ -151,26 +522,198 @@ async def get_specific_meme_of_current_user(
     "/me/memes",
     response_model=MemeResponse,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(api_utils.rate_limit("upload"))],
 )
 async def add_meme(
+    background_tasks: BackgroundTasks,
     description: str = Form(...),
     visibility: bool = Form(...),
     image: UploadFile = File(...),
+    tags: list[str] = Form([]),
     session: AsyncSession = Depends(api_utils.get_session),
     current_user: User = Depends(api_utils.get_current_user),
 ) -> MemeResponse:
+    tags = normalize_tags(tags)
+    image_hash = await hash_upload(image)
     image_path = await upload_image(image)
 
-    new_meme = Meme(
-        description=description,
-        image_url=image_path,
-        visibility=visibility,
-        owner_id=current_user.user_id,
+    new_meme = await session.scalar(
+        insert_meme(
+            description=description,
+            image_url=image_path,
+            visibility=visibility,
+            tags=tags,
+            phash=image_hash,
+            owner_id=current_user.user_id,
+        )
+    )
+    await session.commit()
+    index_meme(new_meme)
+    schedule_meme_variants(background_tasks, new_meme, image_path)
+    return new_meme
+
+
+@router.post(
+    "/me/memes/uploads",
+    response_model=MemeUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    description="Get a presigned POST policy to upload a meme image straight to storage.",
+    dependencies=[Depends(api_utils.rate_limit("upload"))],
+)
+async def create_meme_upload(
+    upload: MemeUploadRequest,
+    session: AsyncSession = Depends(api_utils.get_session),
+    current_user: User = Depends(api_utils.get_current_user),
+) -> MemeUploadResponse:
+    settings = get_settings().minio
+    if upload.content_type not in settings.upload_content_types:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported image content type.",
+        )
+
+    # A fresh key per policy. Confirming copies the upload elsewhere, a policy
+    # reused after that only overwrites the upload, which is then cleaned up.
+    image_path = f"uploads/{current_user.user_id}/{uuid.uuid4()}/{upload.filename}"
+    taken = await session.scalar(
+        select(Meme.id).where(
+            Meme.owner_id == current_user.user_id, Meme.image_url == image_path
+        )
+    )
+    if taken is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Upload key already in use."
+        )
+    policy = await create_upload_policy(image_path, upload.content_type)
+    # The object lands at the latest when the policy expires and can be
+    # confirmed for upload_confirm_secs after that, plus some clock skew.
+    await enqueue(
+        session,
+        DELETE_UNCONFIRMED_UPLOAD,
+        {"image_path": image_path, "owner_id": current_user.user_id},
+        idempotency_key=image_cleanup_key(image_path, DELETE_UNCONFIRMED_UPLOAD),
+        delay=timedelta(
+            seconds=settings.upload_expire_secs + settings.upload_confirm_secs
+        )
+        + UPLOAD_CLEANUP_SLACK,
+    )
+    await session.commit()
+
+    return MemeUploadResponse(
+        url=policy["url"],
+        fields=policy["fields"],
+        image_path=image_path,
+        expires_at=int(time.time()) + settings.upload_expire_secs,
+    )
+
+
+@router.post(
+    "/me/memes/uploads/confirm",
+    response_model=MemeResponse,
+    status_code=status.HTTP_201_CREATED,
+    description="Create a meme from an image uploaded with a presigned POST policy.",
+    dependencies=[Depends(api_utils.rate_limit("upload"))],
+)
+async def confirm_meme_upload(
+    background_tasks: BackgroundTasks,
+    upload: MemeUploadConfirmRequest,
+    session: AsyncSession = Depends(api_utils.get_session),
+    current_user: User = Depends(api_utils.get_current_user),
+) -> MemeResponse:
+    tags = normalize_tags(upload.tags)
+    if not upload.image_path.startswith(f"uploads/{current_user.user_id}/"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found."
+        )
+
+    # The upload's cleanup job is its single use confirm token.
+    upload_key = image_cleanup_key(upload.image_path, DELETE_UNCONFIRMED_UPLOAD)
+    pending = await session.scalar(
+        select(Job.payload).where(Job.idempotency_key == upload_key)
+    )
+    if pending is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found."
+        )
+    if pending.get("confirmed"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload already confirmed.",
+        )
+
+    image = await head_image(upload.image_path)
+    if image is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found."
+        )
+
+    settings = get_settings().minio
+    confirm_deadline = image["LastModified"] + timedelta(
+        seconds=settings.upload_confirm_secs
     )
+    if confirm_deadline < datetime.now(timezone.utc):
+        # Its cleanup job may be deleting it.
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload expired, upload the image again.",
+        )
+    if (
+        image["ContentLength"] > settings.upload_max_size_bytes
+        or image.get("ContentType") not in settings.upload_content_types
+    ):
+        await delete_image(upload.image_path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Uploaded image is too large or has an unsupported type.",
+        )
 
-    session.add(new_meme)
+    # The meme gets a copy no policy can write to, its policy stays valid
+    # until it expires. The copy is deleted unless the meme is committed.
+    image_path = new_image_path(upload.image_path.rsplit("/", 1)[1])
+    await enqueue(
+        session,
+        DELETE_UNCONFIRMED_UPLOAD,
+        {"image_path": image_path, "owner_id": current_user.user_id},
+        idempotency_key=image_cleanup_key(image_path, DELETE_UNCONFIRMED_UPLOAD),
+        delay=UPLOAD_CLEANUP_SLACK,
+    )
     await session.commit()
-    await session.refresh(new_meme)
+    await copy_image(upload.image_path, image_path)
+
+    image_hash = None
+    if get_settings().image_hash.enabled:
+        image_hash = await compute_image_hash(await download_image(image_path))
+        reject_duplicate(image_hash)
+
+    confirmed = await session.scalar(
+        update(Job)
+        .where(
+            Job.idempotency_key == upload_key,
+            Job.payload["confirmed"].is_(None),
+        )
+        .values(payload=Job.payload.concat({"confirmed": True}))
+        .returning(Job.id)
+    )
+    if confirmed is None:
+        # A racing confirm of the same upload got there first.
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload already confirmed.",
+        )
+    new_meme = await session.scalar(
+        insert_meme(
+            description=upload.description,
+            image_url=image_path,
+            visibility=upload.visibility,
+            tags=tags,
+            phash=image_hash,
+            owner_id=current_user.user_id,
+        )
+    )
+    await session.commit()
+    index_meme(new_meme)
+    schedule_meme_variants(background_tasks, new_meme, image_path)
     return new_meme
 
 
@@ -180,55 +723,117 @@ async def delete_meme(
     current_user: User = Depends(api_utils.get_current_user),
     session: AsyncSession = Depends(api_utils.get_session),
 ) -> None:
-    result = await session.execute(
-        select(Meme).where(Meme.id == meme_id, Meme.owner_id == current_user.user_id)
+    deleted_meme = (
+        delete(Meme)
+        .where(Meme.id == meme_id, Meme.owner_id == current_user.user_id)
+        .returning(Meme.image_url, Meme.variants, Meme.visibility, Meme.owner_id)
+        .cte("deleted_meme")
     )
-    meme = result.scalars().first()
-
-    if not meme:
+    counter = (
+        update(User)
+        .where(User.user_id == deleted_meme.c.owner_id)
+        .values(
+            meme_count=User.meme_count - 1,
+            public_meme_count=User.public_meme_count
+            - cast(deleted_meme.c.visibility, Integer),
+        )
+        .cte("counter")
+    )
+    cleanup = cleanup_images(deleted_meme).cte("cleanup")
+    owner_id = await session.scalar(
+        select(deleted_meme.c.owner_id).add_cte(counter, cleanup)
+    )
+    if owner_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Meme not found or you do not have permission to delete it.",
         )
 
-    await delete_image(meme.image_url.split("/")[-1])
-    await session.delete(meme)
     await session.commit()
+    get_hash_index().discard(meme_id)
+    get_public_meme_cache().invalidate((current_user.user_id, meme_id))
 
 
-@router.put("/me/memes/{meme_id}", response_model=MemeResponse)
+@router.put(
+    "/me/memes/{meme_id}",
+    response_model=MemeResponse,
+    description="Update a meme. Tags are kept unless `tags` is sent, "
+    "a single empty `tags` field removes them all.",
+)
 async def update_meme(
     meme_id: int,
+    background_tasks: BackgroundTasks,
     description: str = Form(...),
     visibility: bool = Form(...),
     image: Optional[UploadFile] = File(...),
+    # None when not sent. Not Optional[list[str]], FastAPI would not parse
+    # repeated form fields into it.
+    tags: list[str] = Form(None),
     current_user: User = Depends(api_utils.get_current_user),
     session: AsyncSession = Depends(api_utils.get_session),
 ) -> MemeResponse:
-    result = await session.execute(
-        select(Meme).where(Meme.id == meme_id, Meme.owner_id == current_user.user_id)
+    values = {"description": description, "visibility": visibility}
+    if tags is not None:
+        values["tags"] = normalize_tags(tags)
+    new_image_path = None
+    if image:
+        image_hash = await hash_upload(image, exclude_id=meme_id)
+        new_image_path = await upload_image(image)
+        values.update(image_url=new_image_path, variants={}, phash=image_hash)
+
+    # The CTEs lock the owned row and expose its previous image and visibility,
+    # so the ownership check, the update, the owner's public counter and the
+    # cleanup of the old image all cost a single statement.
+    old = (
+        select(Meme.id, Meme.image_url, Meme.variants, Meme.visibility)
+        .where(Meme.id == meme_id, Meme.owner_id == current_user.user_id)
+        .with_for_update()
+        .cte("old")
     )
-    meme = result.scalars().first()
-
-    if not meme:
+    updated_meme = (
+        update(Meme)
+        .where(Meme.id == old.c.id, Meme.owner_id == current_user.user_id)
+        .values(**values)
+        .returning(*Meme.__table__.c)
+        .cte("updated_meme")
+    )
+    counter = (
+        update(User)
+        .where(User.user_id == updated_meme.c.owner_id, updated_meme.c.id == old.c.id)
+        .values(
+            public_meme_count=User.public_meme_count
+            + cast(updated_meme.c.visibility, Integer)
+            - cast(old.c.visibility, Integer)
+        )
+        .cte("counter")
+    )
+    ctes = [counter]
+    if new_image_path is not None:
+        # The previous image is freed once the update commits.
+        ctes.append(cleanup_images(old).cte("cleanup"))
+    meme = await session.scalar(
+        select(aliased(Meme, updated_meme))
+        .add_cte(*ctes)
+        .execution_options(populate_existing=True)
+    )
+    if meme is None:
+        if new_image_path is not None:
+            await enqueue(
+                session,
+                DELETE_MEME_IMAGES,
+                {"image_url": new_image_path},
+                idempotency_key=image_cleanup_key(new_image_path),
+            )
+            await session.commit()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Meme not found or you do not have permission to edit it.",
         )
 
-    if image:
-        old_image_path = meme.image_url.split("/")[-1]
-        await delete_image(old_image_path)
-        new_image_path = await upload_image(image)
-        meme.image_url = new_image_path
-
-    if description:
-        meme.description = description
-    if visibility:
-        meme.visibility = visibility
-
-    session.add(meme)
     await session.commit()
-    await session.refresh(meme)
+    index_meme(meme)
+    get_public_meme_cache().invalidate((current_user.user_id, meme_id))
+    if new_image_path is not None:
+        schedule_meme_variants(background_tasks, meme, new_image_path)
 
     return meme
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy import delete
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.security.password import get_password_hash
-from src.api.models import User
+from src.api.models import Follow, Meme, User
 from src.api.schemas.requests import UserUpdatePasswordRequest
 from src.api.schemas.responses import UserResponse
+from src.core.jobs import backfill_timelines, cleanup_images
+from src.core.timeline import stopped_pulling
 from . import api_utils
 
 router = APIRouter()
@@ -27,7 +29,41 @@ async def delete_current_user(
     current_user: User = Depends(api_utils.get_current_user),
     session: AsyncSession = Depends(api_utils.get_session),
 ) -> None:
-    await session.execute(delete(User).where(User.user_id == current_user.user_id))
+    # The cascade drops the memes and follows, so the storage cleanup of every
+    # meme (at a lower priority than the interactive deletes), the followees'
+    # follower counts and their timeline backfills are handled by the same
+    # statement.
+    cleanup = cleanup_images(
+        select(Meme.image_url, Meme.variants)
+        .where(Meme.owner_id == current_user.user_id)
+        .subquery(),
+        priority=-1,
+    ).cte("cleanup")
+    followees = (
+        update(User)
+        .where(
+            User.user_id.in_(
+                select(Follow.followee_id).where(
+                    Follow.follower_id == current_user.user_id
+                )
+            )
+        )
+        .values(follower_count=User.follower_count - 1)
+        .returning(User.user_id, User.follower_count)
+        .cte("followees")
+    )
+    backfill = backfill_timelines(
+        select(followees.c.user_id)
+        .where(
+            stopped_pulling(followees.c.follower_count + 1, followees.c.follower_count)
+        )
+        .subquery()
+    ).cte("backfill")
+    await session.execute(
+        delete(User)
+        .where(User.user_id == current_user.user_id)
+        .add_cte(cleanup, followees, backfill)
+    )
     await session.commit()
 
 
@@ -41,6 +77,9 @@ async def reset_current_user_password(
     session: AsyncSession = Depends(api_utils.get_session),
     current_user: User = Depends(api_utils.get_current_user),
 ) -> None:
-    current_user.hashed_password = get_password_hash(user_update_password.password)
-    session.add(current_user)
+    await session.execute(
+        update(User)
+        .where(User.user_id == current_user.user_id)
+        .values(hashed_password=get_password_hash(user_update_password.password))
+    )
     await session.commit()
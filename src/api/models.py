@@ -1,6 +1,22 @@
 import uuid
+from datetime import datetime
 
-from sqlalchemy import BigInteger, Boolean, ForeignKey, String, Uuid
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    Uuid,
+    func,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -18,6 +34,15 @@ class User(Base):
         String(256), nullable=False, unique=True, index=True
     )
     hashed_password: Mapped[str] = mapped_column(String(128), nullable=False)
+    meme_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    public_meme_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    follower_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
     refresh_tokens: Mapped[list["RefreshToken"]] = relationship(back_populates="user")
     memes: Mapped[list["Meme"]] = relationship(back_populates="owner")
@@ -25,18 +50,128 @@ class User(Base):
 
 class Meme(Base):
     __tablename__ = "meme"
+    # Every per-user query prunes to the one partition holding the owner.
+    __table_args__ = {"postgresql_partition_by": "HASH (owner_id)"}
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     description: Mapped[str] = mapped_column(String(512), nullable=True)
     image_url: Mapped[str] = mapped_column(String(512), nullable=False)
     visibility: Mapped[bool] = mapped_column(Boolean, default=True)
+    variants: Mapped[dict[str, str]] = mapped_column(
+        JSONB, nullable=False, default=dict, server_default="{}"
+    )
+    view_count: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
+    phash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    tags: Mapped[list[str]] = mapped_column(
+        ARRAY(String(64)), nullable=False, default=list, server_default="{}"
+    )
     owner_id: Mapped[str] = mapped_column(
-        ForeignKey("user.user_id", ondelete="CASCADE")
+        ForeignKey("user.user_id", ondelete="CASCADE"), primary_key=True
     )
 
     owner: Mapped["User"] = relationship(back_populates="memes")
 
 
+Index(
+    "ix_meme_popular",
+    Meme.view_count.desc(),
+    Meme.id.desc(),
+    postgresql_where=Meme.visibility.is_(True),
+)
+Index("ix_meme_owner_id_id", Meme.owner_id, Meme.id)
+Index("ix_meme_tags", Meme.tags, postgresql_using="gin")
+# One meme per uploaded object, concurrent confirms of an upload conflict.
+Index("ix_meme_owner_id_image_url", Meme.owner_id, Meme.image_url, unique=True)
+
+
+class Follow(Base):
+    __tablename__ = "follow"
+
+    follower_id: Mapped[str] = mapped_column(
+        ForeignKey("user.user_id", ondelete="CASCADE"), primary_key=True
+    )
+    followee_id: Mapped[str] = mapped_column(
+        ForeignKey("user.user_id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+
+
+class TimelineEntry(Base):
+    """A meme fanned out to a follower's home timeline."""
+
+    __tablename__ = "timeline_entry"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["meme_id", "meme_owner_id"],
+            ["meme.id", "meme.owner_id"],
+            ondelete="CASCADE",
+        ),
+    )
+
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey("user.user_id", ondelete="CASCADE"), primary_key=True
+    )
+    meme_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True)
+    meme_owner_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), nullable=False)
+
+
+class Job(Base):
+    """Durable background work, claimed by the job runner with SKIP LOCKED."""
+
+    __tablename__ = "job"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict] = mapped_column(
+        JSONB, nullable=False, default=dict, server_default="{}"
+    )
+    priority: Mapped[int] = mapped_column(
+        SmallInteger, nullable=False, default=0, server_default="0"
+    )
+    idempotency_key: Mapped[str | None] = mapped_column(
+        String(256), nullable=True, unique=True
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    run_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    locked_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    failed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+# Dead jobs stay for inspection but out of the polling index.
+Index(
+    "ix_job_ready",
+    Job.priority.desc(),
+    Job.run_at,
+    postgresql_where=Job.failed_at.is_(None),
+)
+
+
+class RateLimitBucket(Base):
+    """Token bucket of the shared rate limit backend, see `core.rate_limit`."""
+
+    __tablename__ = "rate_limit_bucket"
+    # Buckets are disposable, skip the WAL.
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key: Mapped[str] = mapped_column(String(256), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    allowed: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+
 class RefreshToken(Base):
     __tablename__ = "refresh_token"
 
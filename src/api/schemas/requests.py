@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 class BaseRequest(BaseModel):
@@ -26,3 +26,15 @@ class MemeCreateRequest(BaseRequest):
 class MemeUpdateRequest(BaseRequest):
     description: str | None = None
     visibility: bool | None = None
+
+
+class MemeUploadRequest(BaseRequest):
+    filename: str = Field(min_length=1, max_length=256, pattern=r"^[^/\\]+$")
+    content_type: str
+
+
+class MemeUploadConfirmRequest(BaseRequest):
+    image_path: str
+    description: str
+    visibility: bool
+    tags: list[str] = []
@@ -24,3 +24,64 @@ class MemeResponse(BaseResponse):
     image_url: str
     visibility: bool
     owner_id: str
+    view_count: int = 0
+    tags: list[str] = []
+    variant_url: str | None = None
+
+
+class MemeUploadResponse(BaseResponse):
+    url: str
+    fields: dict[str, str]
+    image_path: str
+    expires_at: int
+
+
+class WorkerHealthResponse(BaseResponse):
+    pid: int
+    uptime_secs: float
+    rss_bytes: int
+    memory_limit_bytes: int | None
+
+
+class LivenessResponse(BaseResponse):
+    status: str = "ok"
+
+
+class DependencyStatusResponse(BaseResponse):
+    healthy: bool
+    latency_ms: float | None
+    checked_at: float
+    error: str | None
+
+
+class ReadinessResponse(BaseResponse):
+    ready: bool
+    dependencies: dict[str, DependencyStatusResponse]
+
+
+class RouteMetricsResponse(BaseResponse):
+    allowed: int
+    throttled: int
+    shed: int
+    in_flight: int
+
+
+class RateLimitMetricsResponse(BaseResponse):
+    pid: int
+    backend: str
+    routes: dict[str, RouteMetricsResponse]
+
+
+class JobKindMetricsResponse(BaseResponse):
+    succeeded: int
+    retried: int
+    failed: int
+    in_flight: int
+    busy_secs: float
+    per_sec: float
+
+
+class JobMetricsResponse(BaseResponse):
+    pid: int
+    uptime_secs: float
+    kinds: dict[str, JobKindMetricsResponse]
@@ -1,6 +1,7 @@
 from functools import lru_cache
 from pathlib import Path
-from pydantic import AnyHttpUrl, BaseModel, SecretStr, computed_field
+from typing import Literal
+from pydantic import AnyHttpUrl, BaseModel, Field, SecretStr, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from sqlalchemy.engine.url import URL
 
@@ -12,6 +13,26 @@ class Minio(BaseModel):
     access_key_id: str
     secret_access_key: SecretStr
     bucket_name: str
+    upload_max_size_bytes: int = 10 * 1024 * 1024
+    upload_content_types: list[str] = [
+        "image/jpeg",
+        "image/png",
+        "image/gif",
+        "image/webp",
+    ]
+    upload_expire_secs: int = 900
+    # How long after reaching storage an upload can be confirmed, unconfirmed
+    # uploads are deleted once no confirm can succeed anymore.
+    upload_confirm_secs: int = 3600
+    max_pool_connections: int = 50
+    max_concurrency: int = 50
+    connect_timeout_secs: float = 2.0
+    read_timeout_secs: float = 10.0
+    operation_timeout_secs: float = 15.0
+    max_attempts: int = 3
+    retry_backoff_secs: float = 0.1
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout_secs: float = 30.0
 
 
 class Security(BaseModel):
@@ -24,18 +45,155 @@ class Security(BaseModel):
     backend_cors_origins: list[AnyHttpUrl] = []
 
 
+class DatabaseReplica(BaseModel):
+    hostname: str
+    port: int = 5432
+
+
 class Database(BaseModel):
     hostname: str = "postgres"
     username: str = "postgres"
     password: SecretStr
     port: int = 5432
     db: str = "meme_store"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 600
+    pool_pre_ping: bool = True
+    pool_warmup: bool = True
+    statement_cache_size: int = 100
+    prepared_statement_cache_size: int = 100
+    command_timeout: float | None = None
+    connect_timeout: float = 10.0
+    replicas: list[DatabaseReplica] = []
+    replica_strategy: Literal["round_robin", "least_busy"] = "round_robin"
+    replica_health_check_interval_secs: float = 5.0
+    counters_reconcile_interval_secs: float | None = 3600.0
+
+
+class ImageCache(BaseModel):
+    enabled: bool = False
+    directory: Path = PROJECT_DIR / ".image_cache"
+    # Shared by all workers of a server, each gets an equal slice.
+    max_size_bytes: int = 1024 * 1024 * 1024
+    max_object_size_bytes: int = 32 * 1024 * 1024
+    chunk_size: int = 64 * 1024
+    max_age_secs: int = 3600
+
+
+class ImageVariants(BaseModel):
+    enabled: bool = True
+    widths: list[int] = [160, 320, 640]
+    formats: list[Literal["webp", "avif"]] = ["webp"]
+    quality: int = 80
+    max_workers: int | None = None
+
+
+class ImageHash(BaseModel):
+    enabled: bool = True
+    reject_duplicates: bool = False
+    duplicate_max_distance: int = 4
+    similar_max_distance: int = 12
+    refresh_interval_secs: float = 300.0
+    # Ids below the highest one loaded that each refresh reads again, to
+    # pick up memes whose insert committed after a later one's.
+    refresh_overlap_ids: int = 1000
+    full_reload_interval_secs: float = 3600.0
+
+
+class Timeline(BaseModel):
+    max_length: int = 1000
+    fan_out_max_followers: int = 10_000
+    # Timelines can exceed max_length by what is fanned out in between.
+    trim_interval_secs: float | None = 600.0
+    trim_batch_size: int = 1000
+
+
+class Events(BaseModel):
+    enabled: bool = True
+    heartbeat_secs: float = 15.0
+    client_queue_size: int = 100
+    reconnect_delay_secs: float = 5.0
+
+
+class ResponseCache(BaseModel):
+    enabled: bool = True
+    max_entries: int = 10_000
+    # Must stay well below the 900s expiry of the presigned URLs it holds.
+    ttl_secs: float = Field(30.0, gt=0, lt=900)
+
+
+class Jobs(BaseModel):
+    enabled: bool = True
+    workers: int = 2
+    batch_size: int = 10
+    poll_interval_secs: float = 1.0
+    # A job still running after its lease is handed to another worker.
+    lease_secs: float = 300.0
+    max_attempts: int = 8
+    retry_backoff_secs: float = 2.0
+    max_retry_backoff_secs: float = 600.0
+
+
+class ViewCounters(BaseModel):
+    enabled: bool = True
+    flush_interval_secs: float = 5.0
+    max_pending: int = 10_000
+
+
+class RouteLimit(BaseModel):
+    rate: float
+    burst: int
+    max_concurrency: int | None = None
+
+
+class RateLimits(BaseModel):
+    enabled: bool = True
+    backend: Literal["memory", "postgres"] = "memory"
+    max_keys: int = 100_000
+    # How often the postgres backend deletes buckets that are full again.
+    cleanup_interval_secs: float | None = 300.0
+    max_wait_secs: float = 1.0
+    routes: dict[str, RouteLimit] = {
+        "login": RouteLimit(rate=0.2, burst=5),
+        "register": RouteLimit(rate=0.05, burst=3),
+        "upload": RouteLimit(rate=0.5, burst=10, max_concurrency=16),
+        "list_memes": RouteLimit(rate=10.0, burst=50, max_concurrency=64),
+        "export": RouteLimit(rate=0.02, burst=2, max_concurrency=4),
+    }
+
+
+class Server(BaseModel):
+    bind: str = "0.0.0.0:8000"
+    workers: int | None = None
+    max_requests: int = 0
+    max_requests_jitter: int = 0
+    max_worker_memory_mb: int | None = None
+    memory_check_interval_secs: float = 10.0
+    graceful_timeout: int = 30
+    keepalive: int = 5
+    # Addresses of the load balancers allowed to set X-Forwarded-For, the
+    # client address, and so the anonymous rate limit key, is taken from it.
+    forwarded_allow_ips: list[str] = ["127.0.0.1"]
+    readiness_check_interval_secs: float = 10.0
+    readiness_timeout_secs: float = 2.0
 
 
 class Settings(BaseSettings):
     security: Security
     database: Database
     minio: Minio
+    image_cache: ImageCache = ImageCache()
+    image_variants: ImageVariants = ImageVariants()
+    image_hash: ImageHash = ImageHash()
+    view_counters: ViewCounters = ViewCounters()
+    timeline: Timeline = Timeline()
+    events: Events = Events()
+    rate_limits: RateLimits = RateLimits()
+    response_cache: ResponseCache = ResponseCache()
+    jobs: Jobs = Jobs()
+    server: Server = Server()
 
     @computed_field
     @property
@@ -49,6 +207,14 @@ class Settings(BaseSettings):
             database=self.database.db,
         )
 
+    @computed_field
+    @property
+    def sqlalchemy_replica_uris(self) -> list[URL]:
+        return [
+            self.sqlalchemy_database_uri.set(host=replica.hostname, port=replica.port)
+            for replica in self.database.replicas
+        ]
+
     model_config = SettingsConfigDict(
         env_file=f"{PROJECT_DIR}/.env",
         case_sensitive=False,
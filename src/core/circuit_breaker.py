@@ -0,0 +1,57 @@
+import time
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Circuit open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fail fast once a dependency keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are rejected for `reset_timeout_secs`. Then a single trial call
+    is let through (half-open): success closes the circuit, failure opens
+    it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout_secs: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_secs = reset_timeout_secs
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout_secs:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        retry_after = self.reset_timeout_secs - (time.monotonic() - self.opened_at)
+        raise CircuitOpenError(max(retry_after, 1.0))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give back the half-open slot of a call that ended without a verdict."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
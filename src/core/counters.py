@@ -0,0 +1,179 @@
+import asyncio
+
+from sqlalchemy import BigInteger, Uuid, column, func, select, text, update, values
+
+from src.api.models import Follow, Meme, User
+from src.config import get_settings
+from src.core import database
+from src.core.jobs import backfill_timelines
+from src.core.timeline import stopped_pulling
+
+# Arbitrary key shared by all workers so only one of them reconciles at a time.
+RECONCILE_LOCK_KEY = 35_001
+
+
+async def reconcile_user_counters() -> int:
+    """Repair drifted per-user counters, return the number of rows fixed.
+
+    Counts come from the statement snapshot, so a row is only repaired if its
+    counter still holds the value read in that snapshot. A meme committed
+    mid-scan bumps the counter and makes the UPDATE skip the row instead of
+    overwriting the fresh value with the stale count.
+    """
+    actual = (
+        select(
+            User.user_id,
+            User.meme_count.label("seen_meme_count"),
+            User.public_meme_count.label("seen_public"),
+            func.count(Meme.id).label("meme_count"),
+            func.count(Meme.id).filter(Meme.visibility.is_(True)).label("public"),
+        )
+        .outerjoin(Meme, Meme.owner_id == User.user_id)
+        .group_by(User.user_id)
+        .subquery()
+    )
+    followers = (
+        select(
+            User.user_id,
+            User.follower_count.label("seen_follower_count"),
+            func.count(Follow.follower_id).label("follower_count"),
+        )
+        .outerjoin(Follow, Follow.followee_id == User.user_id)
+        .group_by(User.user_id)
+        .subquery()
+    )
+
+    async with database.get_async_session() as session:
+        locked = await session.scalar(
+            text("SELECT pg_try_advisory_xact_lock(:key)"),
+            {"key": RECONCILE_LOCK_KEY},
+        )
+        if not locked:
+            return 0
+
+        result = await session.execute(
+            update(User)
+            .where(
+                User.user_id == actual.c.user_id,
+                User.meme_count == actual.c.seen_meme_count,
+                User.public_meme_count == actual.c.seen_public,
+                (User.meme_count != actual.c.meme_count)
+                | (User.public_meme_count != actual.c.public),
+            )
+            .values(meme_count=actual.c.meme_count, public_meme_count=actual.c.public)
+            .execution_options(synchronize_session=False)
+        )
+        repaired_followers = (
+            update(User)
+            .where(
+                User.user_id == followers.c.user_id,
+                User.follower_count == followers.c.seen_follower_count,
+                User.follower_count != followers.c.follower_count,
+            )
+            .values(follower_count=followers.c.follower_count)
+            .returning(
+                User.user_id,
+                User.follower_count,
+                followers.c.seen_follower_count,
+            )
+            .cte("repaired_followers")
+        )
+        backfill = backfill_timelines(
+            select(repaired_followers.c.user_id)
+            .where(
+                stopped_pulling(
+                    repaired_followers.c.seen_follower_count,
+                    repaired_followers.c.follower_count,
+                )
+            )
+            .subquery()
+        ).cte("backfill")
+        follower_repaired = await session.scalar(
+            select(func.count()).select_from(repaired_followers).add_cte(backfill)
+        )
+        await session.commit()
+    return result.rowcount + follower_repaired
+
+
+async def run_counter_reconciliation() -> None:
+    interval = get_settings().database.counters_reconcile_interval_secs
+    while interval:
+        await asyncio.sleep(interval)
+        try:
+            repaired = await reconcile_user_counters()
+        except Exception as e:
+            print(f"Error reconciling user counters: {e}")
+            continue
+        if repaired:
+            print(f"Reconciled {repaired} drifted user counters.")
+
+
+class ViewCounter:
+    """In-process buffer of meme views, flushed with one bulk UPDATE.
+
+    Views of memes not yet buffered are dropped once `max_pending` ids are
+    waiting, so memory stays bounded if the database falls behind.
+    """
+
+    def __init__(self) -> None:
+        self.dropped = 0
+        # Keyed by the full (id, owner_id) primary key of the partitioned table.
+        self._pending: dict[tuple[int, str], int] = {}
+        self._full = asyncio.Event()
+
+    def record(self, meme_id: int, owner_id: str, views: int = 1) -> None:
+        key = (meme_id, owner_id)
+        max_pending = get_settings().view_counters.max_pending
+        if key not in self._pending and len(self._pending) >= max_pending:
+            self.dropped += views
+            self._full.set()
+            return
+        self._pending[key] = self._pending.get(key, 0) + views
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._full.clear()
+        if not pending:
+            return
+
+        # Sorted ids keep concurrent flushes from different workers deadlock-free.
+        increments = values(
+            column("id", BigInteger),
+            column("owner_id", Uuid(as_uuid=False)),
+            column("views", BigInteger),
+            name="increments",
+        ).data([(*key, views) for key, views in sorted(pending.items())])
+        try:
+            async with database.get_async_session() as session:
+                await session.execute(
+                    update(Meme)
+                    .where(
+                        Meme.id == increments.c.id,
+                        Meme.owner_id == increments.c.owner_id,
+                    )
+                    .values(view_count=Meme.view_count + increments.c.views)
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"Error flushing view counters: {e}")
+            for (meme_id, owner_id), views in pending.items():
+                self.record(meme_id, owner_id, views)
+
+        if self.dropped:
+            print(f"Dropped {self.dropped} views while the buffer was full.")
+            self.dropped = 0
+
+    async def run(self, interval: float) -> None:
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._full.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self.flush()
+        finally:
+            await self.flush()
+
+
+VIEW_COUNTER = ViewCounter()
@@ -1,3 +1,8 @@
+import asyncio
+import itertools
+from functools import lru_cache
+
+from sqlalchemy import text
 from sqlalchemy.engine.url import URL
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -6,23 +11,147 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
-from src.config import get_settings
+from src.config import Database, get_settings
 
 
-def new_async_engine(uri: URL) -> AsyncEngine:
+def new_async_engine(uri: URL, settings: Database) -> AsyncEngine:
     return create_async_engine(
-        uri,
-        pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10,
-        pool_timeout=30.0,
-        pool_recycle=600,
+        uri.update_query_dict(
+            {
+                "prepared_statement_cache_size": str(
+                    settings.prepared_statement_cache_size
+                )
+            }
+        ),
+        pool_pre_ping=settings.pool_pre_ping,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        connect_args={
+            "statement_cache_size": settings.statement_cache_size,
+            "command_timeout": settings.command_timeout,
+            "timeout": settings.connect_timeout,
+        },
+    )
+
+
+async def warm_up_engine(engine: AsyncEngine, connections: int) -> None:
+    """Open the pool's base connections up front so first requests skip connect."""
+    opened = await asyncio.gather(
+        *(engine.connect() for _ in range(connections)), return_exceptions=True
+    )
+    for connection in opened:
+        if isinstance(connection, BaseException):
+            print(f"Error warming up connection pool: {connection}")
+        else:
+            await connection.close()
+
+
+class Replica:
+    def __init__(self, uri: URL, settings: Database) -> None:
+        self.engine = new_async_engine(uri, settings)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.healthy = True
+
+    @property
+    def busy_connections(self) -> int:
+        return self.engine.pool.checkedout()
+
+    async def ping(self) -> None:
+        async with self.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def check_health(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self.ping(), timeout)
+        except Exception as e:
+            if self.healthy:
+                print(f"Replica {self.engine.url.host} is unhealthy: {e}")
+            self.healthy = False
+        else:
+            self.healthy = True
+
+
+class ReplicaSet:
+    def __init__(self, uris: list[URL], settings: Database) -> None:
+        self.replicas = [Replica(uri, settings) for uri in uris]
+        self.strategy = settings.replica_strategy
+        self._round_robin = itertools.cycle(self.replicas)
+
+    def choose(self) -> Replica | None:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.strategy == "least_busy":
+            return min(healthy, key=lambda replica: replica.busy_connections)
+        for replica in self._round_robin:
+            if replica.healthy:
+                return replica
+
+    async def run_health_checks(self, interval: float) -> None:
+        while self.replicas:
+            await asyncio.gather(
+                *(replica.check_health(timeout=interval) for replica in self.replicas)
+            )
+            await asyncio.sleep(interval)
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+@lru_cache(maxsize=1)
+def get_async_engine() -> AsyncEngine:
+    return new_async_engine(
+        get_settings().sqlalchemy_database_uri, get_settings().database
     )
 
 
-_ASYNC_ENGINE = new_async_engine(get_settings().sqlalchemy_database_uri)
-_ASYNC_SESSIONMAKER = async_sessionmaker(_ASYNC_ENGINE, expire_on_commit=False)
+@lru_cache(maxsize=1)
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(get_async_engine(), expire_on_commit=False)
+
+
+@lru_cache(maxsize=1)
+def get_replica_set() -> ReplicaSet:
+    return ReplicaSet(get_settings().sqlalchemy_replica_uris, get_settings().database)
 
 
 def get_async_session() -> AsyncSession:
-    return _ASYNC_SESSIONMAKER()
+    return get_async_sessionmaker()()
+
+
+def has_replicas() -> bool:
+    return bool(get_settings().database.replicas)
+
+
+def get_async_read_session() -> AsyncSession:
+    """Session on a healthy replica, falling back to the primary."""
+    replica = get_replica_set().choose()
+    if replica is None:
+        return get_async_session()
+    return replica.sessionmaker()
+
+
+async def ping() -> None:
+    async with get_async_engine().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def warm_up() -> None:
+    connections = get_settings().database.pool_size
+    await asyncio.gather(
+        warm_up_engine(get_async_engine(), connections),
+        *(
+            warm_up_engine(replica.engine, connections)
+            for replica in get_replica_set().replicas
+        ),
+    )
+
+
+async def dispose() -> None:
+    if get_replica_set.cache_info().currsize:
+        await get_replica_set().dispose()
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
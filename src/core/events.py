@@ -0,0 +1,131 @@
+import asyncio
+import json
+from collections import defaultdict
+
+import asyncpg
+
+from src.config import get_settings
+from src.core.response_cache import get_public_meme_cache
+from src.core.s3 import get_image_url
+
+# Fired by the meme_notify_new trigger for every new public meme.
+NEW_MEME_CHANNEL = "new_meme"
+# Fired by the meme_notify_changed triggers when a meme is edited or deleted.
+CHANGED_MEME_CHANNEL = "changed_meme"
+GLOBAL_TOPIC = "global"
+
+
+class Subscriber:
+    """One SSE connection, a bounded queue of pre-encoded events.
+
+    A client too slow to drain its queue is disconnected instead of letting
+    events pile up in memory, it can reconnect and catch up from the API.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue(queue_size)
+
+    def push(self, event: bytes) -> bool:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+        return True
+
+
+class MemeBroadcaster:
+    """Single LISTEN connection per worker fanned out to in-process subscribers.
+
+    It also drops public meme responses cached by this worker when another
+    worker edits or deletes the meme, so it runs whenever either the events or
+    the response cache are enabled, listening only on the channels they need.
+    """
+
+    def __init__(self) -> None:
+        self.topics: defaultdict[str, set[Subscriber]] = defaultdict(set)
+        self._connection: asyncpg.Connection | None = None
+        self._dispatches: set[asyncio.Task] = set()
+
+    def subscribe(self, topic: str) -> Subscriber:
+        subscriber = Subscriber(get_settings().events.client_queue_size)
+        self.topics[topic].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, topic: str, subscriber: Subscriber) -> None:
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.topics[topic]
+
+    def publish(self, topic: str, event: bytes) -> None:
+        for subscriber in list(self.topics.get(topic, ())):
+            if not subscriber.push(event):
+                self.unsubscribe(topic, subscriber)
+
+    async def dispatch(self, payload: str) -> None:
+        meme = json.loads(payload)
+        topics = [GLOBAL_TOPIC, f"user:{meme['owner_id']}"]
+        if not any(topic in self.topics for topic in topics):
+            return
+
+        # Presign and encode once, every subscriber gets the same bytes.
+        try:
+            meme["image_url"] = await get_image_url(meme["image_url"])
+        except Exception as e:
+            print(f"Error presigning meme {meme['id']} event: {e}")
+            return
+        event = f"id: {meme['id']}\nevent: meme\ndata: {json.dumps(meme)}\n\n".encode()
+        for topic in topics:
+            self.publish(topic, event)
+
+    def _on_notification(
+        self, connection: asyncpg.Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        task = asyncio.create_task(self.dispatch(payload))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    def _on_change(
+        self, connection: asyncpg.Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        owner_id, meme_id = payload.split(":")
+        get_public_meme_cache().invalidate((owner_id, int(meme_id)))
+
+    async def run(self) -> None:
+        """Keep a LISTEN connection open, reconnecting when it drops."""
+        dsn = (
+            get_settings()
+            .sqlalchemy_database_uri.set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        while True:
+            lost = asyncio.Event()
+            try:
+                self._connection = await asyncpg.connect(dsn)
+                self._connection.add_termination_listener(lambda _: lost.set())
+                if get_settings().events.enabled:
+                    await self._connection.add_listener(
+                        NEW_MEME_CHANNEL, self._on_notification
+                    )
+                if get_settings().response_cache.enabled:
+                    await self._connection.add_listener(
+                        CHANGED_MEME_CHANNEL, self._on_change
+                    )
+                await lost.wait()
+            except Exception as e:
+                print(f"Error listening for new memes: {e}")
+            finally:
+                # On every path, a failed add_listener included, so a retry
+                # never leaks the previous connection. Nothing to flush on a
+                # LISTEN connection, and terminate cannot hang on a dead one.
+                if self._connection is not None:
+                    self._connection.terminate()
+                    self._connection = None
+            await asyncio.sleep(get_settings().events.reconnect_delay_secs)
+
+
+BROADCASTER = MemeBroadcaster()
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import numpy as np
+from sqlalchemy import func, select
+
+from src.api.models import Meme
+from src.core import database
+
+LOAD_BATCH_SIZE = 10_000
+
+
+class HashIndex:
+    """In-memory index of public meme hashes searched by Hamming distance.
+
+    Hashes are kept in a packed uint64 array so a query is a single
+    vectorized XOR and popcount over every entry.
+    """
+
+    def __init__(self) -> None:
+        self._ids = np.empty(0, dtype=np.int64)
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._size = 0
+        # Highest meme id read from the database, incremental loads go past it.
+        self._loaded_id = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity > len(self._ids):
+            capacity = max(capacity, 1024, 2 * len(self._ids))
+            self._ids = np.resize(self._ids, capacity)
+            self._hashes = np.resize(self._hashes, capacity)
+
+    def extend(self, ids: np.ndarray, hashes: np.ndarray) -> None:
+        self._reserve(self._size + len(ids))
+        end = self._size + len(ids)
+        self._ids[self._size : end] = ids
+        self._hashes[self._size : end] = hashes.view(np.uint64)
+        self._size = end
+
+    def add(self, meme_id: int, image_hash: int) -> None:
+        self.extend(np.array([meme_id]), np.array([image_hash], dtype=np.int64))
+
+    def discard(self, meme_id: int) -> None:
+        positions = np.flatnonzero(self._ids[: self._size] == meme_id)
+        for position in positions[::-1]:
+            last = self._size - 1
+            self._ids[position] = self._ids[last]
+            self._hashes[position] = self._hashes[last]
+            self._size = last
+
+    def search(
+        self, image_hash: int, max_distance: int, limit: int
+    ) -> list[tuple[int, int]]:
+        """Return up to `limit` (meme id, distance) pairs, nearest first."""
+        distances = np.bitwise_count(
+            self._hashes[: self._size] ^ np.int64(image_hash).view(np.uint64)
+        )
+        matches = np.flatnonzero(distances <= max_distance)
+        matches = matches[np.argsort(distances[matches], kind="stable")][:limit]
+        return [(int(self._ids[match]), int(distances[match])) for match in matches]
+
+    async def load(self, after_id: int = 0) -> None:
+        """Stream the hashes of public memes with an id above `after_id` in.
+
+        Rows are read through a server-side cursor in batches, converted
+        straight into the arrays, so no full result set is ever held. Memes
+        already in the index are not added again.
+        """
+        public_hashes = (
+            Meme.visibility.is_(True),
+            Meme.phash.is_not(None),
+            Meme.id > after_id,
+        )
+        fresh = not self._size
+        async with database.get_async_read_session() as session:
+            if fresh:
+                self._reserve(
+                    await session.scalar(
+                        select(func.count()).select_from(Meme).where(*public_hashes)
+                    )
+                )
+            result = await session.stream(
+                select(Meme.id, Meme.phash)
+                .where(*public_hashes)
+                .execution_options(yield_per=LOAD_BATCH_SIZE)
+            )
+            async for rows in result.partitions():
+                ids = np.fromiter((row.id for row in rows), np.int64, len(rows))
+                hashes = np.fromiter((row.phash for row in rows), np.int64, len(rows))
+                self._loaded_id = max(self._loaded_id, int(ids.max(initial=0)))
+                if not fresh:
+                    # Skip memes this worker indexed itself when they were saved,
+                    # and those of the window loaded again.
+                    new = ~np.isin(ids, self._ids[: self._size])
+                    ids, hashes = ids[new], hashes[new]
+                self.extend(ids, hashes)
+
+    async def reload(self) -> None:
+        """Rebuild from scratch, dropping memes deleted or hidden elsewhere."""
+        fresh = HashIndex()
+        await fresh.load()
+        self._ids, self._hashes = fresh._ids, fresh._hashes
+        self._size, self._loaded_id = fresh._size, fresh._loaded_id
+
+    async def run(
+        self, interval: float, full_reload_interval: float, overlap_ids: int
+    ) -> None:
+        """Pick up memes written by other workers.
+
+        Every `interval` only memes past the highest loaded id, less
+        `overlap_ids`, are read. Ids are taken at insert but committed in any
+        order, a meme committed after a higher id was loaded is still in that
+        window on the next refresh. The whole index is rebuilt every
+        `full_reload_interval`.
+        """
+        reloaded_at = None
+        while True:
+            try:
+                if (
+                    reloaded_at is None
+                    or time.monotonic() - reloaded_at >= full_reload_interval
+                ):
+                    await self.reload()
+                    reloaded_at = time.monotonic()
+                else:
+                    await self.load(after_id=max(self._loaded_id - overlap_ids, 0))
+            except Exception as e:
+                print(f"Error loading image hash index: {e}")
+            await asyncio.sleep(interval)
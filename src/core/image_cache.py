@@ -0,0 +1,213 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import shutil
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from functools import lru_cache
+from pathlib import Path
+
+from anyio import AsyncFile
+from pydantic import BaseModel
+
+from src.config import get_settings
+from src.core.worker import get_worker_count
+
+
+class CachedImage(BaseModel):
+    key: str
+    path: Path
+    size: int
+    etag: str
+    content_type: str
+
+
+class DiskLRUCache:
+    """Size-bounded on-disk cache of S3 objects, evicted in LRU order.
+
+    Object keys are immutable (every upload gets a fresh uuid prefix), so
+    entries never need revalidation, only eviction.
+    """
+
+    def __init__(self, directory: Path, max_size_bytes: int) -> None:
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        self.size_bytes = 0
+        self._entries: OrderedDict[str, CachedImage] = OrderedDict()
+        # Held open for as long as the directory is in use.
+        self.lock_fd: int | None = None
+
+    def _data_path(self, key: str) -> Path:
+        return self.directory / hashlib.sha256(key.encode()).hexdigest()
+
+    def load(self) -> None:
+        """Pick up the entries already on disk, blocking, run it in a thread."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        metas = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for meta_path in metas:
+            try:
+                entry = CachedImage.model_validate_json(meta_path.read_text())
+            except ValueError:
+                meta_path.unlink(missing_ok=True)
+                continue
+            if not entry.path.exists():
+                meta_path.unlink(missing_ok=True)
+                continue
+            self._entries[entry.key] = entry
+            self.size_bytes += entry.size
+        self._remove_files(*self._evict())
+
+    def get(self, key: str) -> CachedImage | None:
+        """The entry of `key`, its file may be gone if removed outside the cache.
+
+        Callers `discard` the key when opening the file fails, rather than
+        every hit paying for a stat on the event loop.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def new_temp_path(self) -> Path:
+        return self.directory / f"{uuid.uuid4()}.tmp"
+
+    async def put(
+        self, key: str, temp_path: Path, etag: str, content_type: str
+    ) -> None:
+        if key in self._entries:
+            await asyncio.to_thread(temp_path.unlink, missing_ok=True)
+            return
+
+        entry = await asyncio.to_thread(self._store, key, temp_path, etag, content_type)
+        if key in self._entries:
+            # Stored meanwhile by another request, over the same file.
+            return
+        self._entries[key] = entry
+        self.size_bytes += entry.size
+        if evicted := self._evict():
+            await asyncio.to_thread(self._remove_files, *evicted)
+
+    async def discard(self, key: str) -> None:
+        self._forget(key)
+        await asyncio.to_thread(self._remove_files, key)
+
+    def _store(
+        self, key: str, temp_path: Path, etag: str, content_type: str
+    ) -> CachedImage:
+        data_path = self._data_path(key)
+        os.replace(temp_path, data_path)
+        entry = CachedImage(
+            key=key,
+            path=data_path,
+            size=data_path.stat().st_size,
+            etag=etag,
+            content_type=content_type,
+        )
+        data_path.with_suffix(".json").write_text(entry.model_dump_json())
+        return entry
+
+    def _forget(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry.size
+
+    def _remove_files(self, *keys: str) -> None:
+        for key in keys:
+            data_path = self._data_path(key)
+            data_path.with_suffix(".json").unlink(missing_ok=True)
+            data_path.unlink(missing_ok=True)
+
+    def _evict(self) -> list[str]:
+        """Forget the oldest entries over the size, their files are left to remove."""
+        evicted = []
+        while self.size_bytes > self.max_size_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._forget(oldest_key)
+            evicted.append(oldest_key)
+        return evicted
+
+
+def lock_worker_directory(directory: Path) -> int:
+    """Lock the cache directory of this worker, return the descriptor holding it.
+
+    The lock is on `<directory>.lock` and is released by the OS when the
+    process exits, however it exits, so a reused pid can never pass for it.
+    """
+    lock_path = directory.with_suffix(".lock")
+    while True:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            # Unless it was removed as dead while we were waiting for it.
+            if os.stat(lock_path).st_ino == os.fstat(fd).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        os.close(fd)
+    directory.mkdir(exist_ok=True)
+    return fd
+
+
+def remove_dead_worker_caches(directory: Path) -> None:
+    """Remove the directories whose worker no longer holds their lock."""
+    for lock_path in directory.glob("*.lock"):
+        try:
+            fd = os.open(lock_path, os.O_RDWR)
+        except FileNotFoundError:
+            continue
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            continue
+        else:
+            shutil.rmtree(lock_path.with_suffix(""), ignore_errors=True)
+            lock_path.unlink(missing_ok=True)
+        finally:
+            os.close(fd)
+    # A directory is created after its lock, left without one it is a
+    # leftover of a removal that was interrupted or of a pid named cache.
+    for worker_directory in directory.iterdir():
+        if (
+            worker_directory.is_dir()
+            and not worker_directory.with_suffix(".lock").exists()
+        ):
+            shutil.rmtree(worker_directory, ignore_errors=True)
+
+
+@lru_cache(maxsize=1)
+def get_image_cache() -> DiskLRUCache:
+    """The cache of this worker process.
+
+    Each worker owns a subdirectory and an equal share of `max_size_bytes`,
+    so no worker evicts files another one is serving or has accounted for.
+    Directories of workers that are gone are removed. Blocking, it is first
+    called from a thread at startup.
+    """
+    settings = get_settings().image_cache
+    settings.directory.mkdir(parents=True, exist_ok=True)
+    remove_dead_worker_caches(settings.directory)
+    directory = settings.directory / uuid.uuid4().hex
+    cache = DiskLRUCache(directory, settings.max_size_bytes // get_worker_count())
+    cache.lock_fd = lock_worker_directory(directory)
+    cache.load()
+    return cache
+
+
+async def read_file_chunks(
+    file: AsyncFile[bytes], start: int, end: int, chunk_size: int
+) -> AsyncIterator[bytes]:
+    """Stream a byte range of a file opened upfront, it is closed once done.
+
+    An open file keeps being readable even if the entry is evicted meanwhile.
+    """
+    remaining = end - start + 1
+    async with file:
+        await file.seek(start)
+        while remaining > 0:
+            chunk = await file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
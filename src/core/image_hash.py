@@ -0,0 +1,59 @@
+import asyncio
+import io
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from src.config import get_settings
+from src.core.image_variants import get_process_pool
+
+if TYPE_CHECKING:
+    from src.core.hash_index import HashIndex
+
+HASH_SIZE = 8
+
+
+def dhash(data: bytes) -> int:
+    """64-bit difference hash of an image, runs inside a worker process.
+
+    Returned as a signed integer so it fits the BIGINT column as is.
+    """
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("L", (HASH_SIZE * 4, HASH_SIZE * 4))
+        small = image.convert("L").resize(
+            (HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS
+        )
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = np.packbits(pixels[:, 1:] > pixels[:, :-1])
+    return int(bits.view(">i8")[0])
+
+
+async def compute_image_hash(data: bytes) -> int | None:
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_process_pool(), dhash, data)
+    except Exception as e:
+        print(f"Error hashing image: {e}")
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_hash_index() -> "HashIndex":
+    # numpy is only imported once the index is used, not with the app.
+    from src.core.hash_index import HashIndex
+
+    return HashIndex()
+
+
+def find_duplicate(image_hash: int | None, exclude_id: int | None = None) -> int | None:
+    settings = get_settings().image_hash
+    if image_hash is None or not settings.reject_duplicates:
+        return None
+    for meme_id, _ in get_hash_index().search(
+        image_hash, settings.duplicate_max_distance, 2
+    ):
+        if meme_id != exclude_id:
+            return meme_id
+    return None
@@ -0,0 +1,113 @@
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from src.config import get_settings
+from src.core.s3 import delete_image, download_image, put_image
+from src.core.worker import get_cpu_count, get_worker_count
+
+CONTENT_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+
+
+def render_variants(
+    data: bytes, widths: list[int], formats: list[str], quality: int
+) -> dict[str, bytes]:
+    """Resize and transcode an image, runs inside a worker process."""
+    from PIL import Image, ImageOps
+
+    variants = {}
+    with Image.open(io.BytesIO(data)) as original:
+        targets = sorted({min(width, original.width) for width in widths})
+        # Let JPEG decode straight at a reduced scale when possible.
+        original.draft(
+            "RGB", (targets[-1], targets[-1] * original.height // original.width)
+        )
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        for width in targets:
+            resized = image
+            if width < image.width:
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            for image_format in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, format=image_format.upper(), quality=quality)
+                variants[f"{width}.{image_format}"] = buffer.getvalue()
+    return variants
+
+
+def get_pool_size() -> int:
+    """Processes per worker, by default the CPUs split between the workers.
+
+    Every gunicorn worker has its own pool, the executor's default of one
+    process per CPU would spawn CPU x workers processes in total.
+    """
+    max_workers = get_settings().image_variants.max_workers
+    if max_workers is not None:
+        return max_workers
+    return max(1, get_cpu_count() // get_worker_count())
+
+
+@lru_cache(maxsize=1)
+def get_process_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=get_pool_size(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def shutdown_process_pool() -> None:
+    if get_process_pool.cache_info().currsize:
+        get_process_pool().shutdown(wait=False, cancel_futures=True)
+        get_process_pool.cache_clear()
+
+
+def variant_key(image_path: str, name: str) -> str:
+    return f"{image_path.rsplit('/', 1)[0]}/variants/{name}"
+
+
+def select_variant(variants: dict[str, str], width: int) -> str | None:
+    image_format = get_settings().image_variants.formats[0]
+    candidates = sorted(
+        (int(name.split(".")[0]), key)
+        for name, key in variants.items()
+        if name.endswith(f".{image_format}")
+    )
+    if not candidates:
+        return None
+    for candidate_width, key in candidates:
+        if candidate_width >= width:
+            return key
+    return candidates[-1][1]
+
+
+async def generate_variants(image_path: str) -> dict[str, str]:
+    settings = get_settings().image_variants
+    data = await download_image(image_path)
+
+    loop = asyncio.get_running_loop()
+    rendered = await loop.run_in_executor(
+        get_process_pool(),
+        render_variants,
+        data,
+        settings.widths,
+        settings.formats,
+        settings.quality,
+    )
+
+    variants = {name: variant_key(image_path, name) for name in rendered}
+    await asyncio.gather(
+        *(
+            put_image(variants[name], content, CONTENT_TYPES[name.rsplit(".", 1)[1]])
+            for name, content in rendered.items()
+        )
+    )
+    return variants
+
+
+async def delete_variants(variants: dict[str, str]) -> None:
+    await asyncio.gather(*(delete_image(key) for key in variants.values()))
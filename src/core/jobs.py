@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import random
+import time
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import (
+    FromClause,
+    String,
+    cast,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.models import Job, Meme
+from src.config import get_settings
+from src.core import database
+from src.core.image_variants import delete_variants
+from src.core.s3 import delete_image
+from src.core.timeline import backfill_follower_timelines, fan_out_meme
+
+DELETE_MEME_IMAGES = "delete_meme_images"
+DELETE_UNCONFIRMED_UPLOAD = "delete_unconfirmed_upload"
+FAN_OUT_MEME = "fan_out_meme"
+BACKFILL_TIMELINES = "backfill_timelines"
+
+
+def image_cleanup_key(image_url: str, kind: str = DELETE_MEME_IMAGES) -> str:
+    """Fixed length idempotency key, image paths can be longer than the column.
+
+    Matches `md5()` in SQL for keys built server side.
+    """
+    return f"{kind}:{hashlib.md5(image_url.encode()).hexdigest()}"
+
+
+def cleanup_images(images: FromClause, priority: int = 0) -> Insert:
+    """INSERT a cleanup job per (image_url, variants) row of `images`.
+
+    Meant as a CTE of the statement freeing the images, so the jobs are
+    queued without an extra round trip.
+    """
+    return (
+        insert(Job)
+        .from_select(
+            ["kind", "payload", "priority", "idempotency_key", "max_attempts"],
+            select(
+                literal(DELETE_MEME_IMAGES),
+                func.jsonb_build_object(
+                    "image_url", images.c.image_url, "variants", images.c.variants
+                ),
+                literal(priority),
+                literal(f"{DELETE_MEME_IMAGES}:") + func.md5(images.c.image_url),
+                literal(get_settings().jobs.max_attempts),
+            ),
+            # Python side defaults are not bound when nested in a CTE, the
+            # server defaults of the other columns apply instead.
+            include_defaults=False,
+        )
+        .on_conflict_do_nothing(index_elements=[Job.idempotency_key])
+    )
+
+
+def fan_out_memes(memes: FromClause) -> Insert:
+    """INSERT a fan-out job per public (id, owner_id, visibility) row of `memes`.
+
+    Meant as a CTE of the statement inserting the memes, so the fan-out
+    survives a worker going away once the meme is committed.
+    """
+    return (
+        insert(Job)
+        .from_select(
+            ["kind", "payload", "idempotency_key", "max_attempts"],
+            select(
+                literal(FAN_OUT_MEME),
+                func.jsonb_build_object(
+                    "meme_id", memes.c.id, "owner_id", memes.c.owner_id
+                ),
+                literal(f"{FAN_OUT_MEME}:") + cast(memes.c.id, String),
+                literal(get_settings().jobs.max_attempts),
+            ).where(memes.c.visibility.is_(True)),
+            include_defaults=False,
+        )
+        .on_conflict_do_nothing(index_elements=[Job.idempotency_key])
+    )
+
+
+def backfill_timelines(owners: FromClause) -> Insert:
+    """INSERT a timeline backfill job per (user_id) row of `owners`.
+
+    Meant as a CTE of the statement lowering their follower counts, see
+    `timeline.stopped_pulling`.
+    """
+    return (
+        insert(Job)
+        .from_select(
+            ["kind", "payload", "idempotency_key", "max_attempts"],
+            select(
+                literal(BACKFILL_TIMELINES),
+                func.jsonb_build_object("owner_id", owners.c.user_id),
+                literal(f"{BACKFILL_TIMELINES}:") + cast(owners.c.user_id, String),
+                literal(get_settings().jobs.max_attempts),
+            ),
+            include_defaults=False,
+        )
+        .on_conflict_do_nothing(index_elements=[Job.idempotency_key])
+    )
+
+
+async def delete_meme_images(payload: dict[str, Any]) -> None:
+    await delete_image(payload["image_url"])
+    await delete_variants(payload.get("variants", {}))
+
+
+async def delete_unconfirmed_upload(payload: dict[str, Any]) -> None:
+    async with database.get_async_session() as session:
+        confirmed = await session.scalar(
+            select(Meme.id).where(
+                Meme.owner_id == payload["owner_id"],
+                Meme.image_url == payload["image_path"],
+            )
+        )
+    if confirmed is None:
+        await delete_image(payload["image_path"])
+
+
+async def fan_out(payload: dict[str, Any]) -> None:
+    await fan_out_meme(payload["meme_id"], payload["owner_id"])
+
+
+async def backfill_followers(payload: dict[str, Any]) -> None:
+    await backfill_follower_timelines(payload["owner_id"])
+
+
+JOB_HANDLERS: dict[str, Callable[[dict[str, Any]], Awaitable[None]]] = {
+    DELETE_MEME_IMAGES: delete_meme_images,
+    DELETE_UNCONFIRMED_UPLOAD: delete_unconfirmed_upload,
+    FAN_OUT_MEME: fan_out,
+    BACKFILL_TIMELINES: backfill_followers,
+}
+
+
+async def enqueue(
+    session: AsyncSession,
+    kind: str,
+    payload: dict[str, Any],
+    priority: int = 0,
+    idempotency_key: str | None = None,
+    delay: timedelta | None = None,
+) -> None:
+    """Add a job to the caller's transaction, it only runs once committed.
+
+    A job whose idempotency key is already queued is not queued again.
+    """
+    await session.execute(
+        insert(Job)
+        .values(
+            kind=kind,
+            payload=payload,
+            priority=priority,
+            idempotency_key=idempotency_key,
+            max_attempts=get_settings().jobs.max_attempts,
+            run_at=func.now() + (delay or timedelta()),
+        )
+        .on_conflict_do_nothing(index_elements=[Job.idempotency_key])
+    )
+
+
+class JobMetrics(BaseModel):
+    succeeded: int = 0
+    retried: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    busy_secs: float = 0.0
+
+
+class JobRunner:
+    """Asyncio workers polling the job table with FOR UPDATE SKIP LOCKED.
+
+    A claimed job is leased rather than kept locked, so a worker dying
+    mid-job only delays it until the lease runs out.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, JobMetrics] = {}
+
+    async def claim(self) -> list[Job]:
+        settings = get_settings().jobs
+        ready = (
+            select(Job.id)
+            .where(
+                Job.failed_at.is_(None),
+                Job.run_at <= func.now(),
+                or_(Job.locked_until.is_(None), Job.locked_until < func.now()),
+            )
+            .order_by(Job.priority.desc(), Job.run_at)
+            .limit(settings.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with database.get_async_session() as session:
+            result = await session.scalars(
+                update(Job)
+                .where(Job.id.in_(ready.scalar_subquery()))
+                .values(
+                    attempts=Job.attempts + 1,
+                    locked_until=func.now() + timedelta(seconds=settings.lease_secs),
+                )
+                .returning(Job)
+                .execution_options(synchronize_session=False)
+            )
+            jobs = result.all()
+            await session.commit()
+        return jobs
+
+    def retry_delay(self, attempts: int) -> float:
+        settings = get_settings().jobs
+        backoff = min(
+            settings.max_retry_backoff_secs,
+            settings.retry_backoff_secs * 2 ** (attempts - 1),
+        )
+        return random.uniform(backoff / 2, backoff)
+
+    async def execute(self, job: Job) -> None:
+        metrics = self.metrics.setdefault(job.kind, JobMetrics())
+        metrics.in_flight += 1
+        started_at = time.monotonic()
+        try:
+            await JOB_HANDLERS[job.kind](job.payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job.attempts >= job.max_attempts:
+                metrics.failed += 1
+                print(f"Job {job.id} ({job.kind}) failed for good: {error}")
+                values = {"failed_at": func.now()}
+            else:
+                metrics.retried += 1
+                delay = timedelta(seconds=self.retry_delay(job.attempts))
+                values = {"run_at": func.now() + delay}
+            statement = (
+                update(Job)
+                .where(Job.id == job.id)
+                .values(locked_until=None, last_error=error, **values)
+            )
+        else:
+            metrics.succeeded += 1
+            statement = delete(Job).where(Job.id == job.id)
+        finally:
+            metrics.in_flight -= 1
+            metrics.busy_secs += time.monotonic() - started_at
+
+        try:
+            async with database.get_async_session() as session:
+                await session.execute(statement)
+                await session.commit()
+        except Exception as e:
+            # The lease runs out and the job is picked up again.
+            print(f"Error recording the outcome of job {job.id}: {e}")
+
+    async def work(self) -> None:
+        settings = get_settings().jobs
+        while True:
+            try:
+                jobs = await self.claim()
+            except Exception as e:
+                print(f"Error claiming jobs: {e}")
+                jobs = []
+            await asyncio.gather(*(self.execute(job) for job in jobs))
+            # Keep draining while the queue fills whole batches.
+            if len(jobs) < settings.batch_size:
+                await asyncio.sleep(settings.poll_interval_secs)
+
+    async def run(self) -> None:
+        await asyncio.gather(*(self.work() for _ in range(get_settings().jobs.workers)))
+
+
+JOB_RUNNER = JobRunner()
@@ -0,0 +1,180 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from functools import lru_cache
+
+from pydantic import BaseModel
+from sqlalchemy import delete, func, text
+
+from src.api.models import RateLimitBucket
+from src.config import RouteLimit, get_settings
+from src.core import database
+
+# Arbitrary key shared by all workers so only one of them cleans up at a time.
+CLEANUP_LOCK_KEY = 35_003
+
+# Tokens after refilling for the time elapsed since the last request.
+_REFILLED = (
+    "LEAST(:burst, bucket.tokens"
+    " + EXTRACT(EPOCH FROM clock_timestamp() - bucket.updated_at) * :rate)"
+)
+TAKE_TOKEN = text(
+    f"""
+    INSERT INTO rate_limit_bucket AS bucket (key, tokens, allowed, updated_at)
+    VALUES (:key, :burst - 1, true, clock_timestamp())
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = {_REFILLED} - CASE WHEN {_REFILLED} >= 1 THEN 1 ELSE 0 END,
+        allowed = {_REFILLED} >= 1,
+        updated_at = clock_timestamp()
+    RETURNING allowed, tokens
+    """
+)
+
+
+class MemoryBuckets:
+    """Token buckets of this worker, the least recently used are evicted."""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, limit: RouteLimit) -> float | None:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated_at) * limit.rate)
+
+        retry_after = None
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / limit.rate
+
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class PostgresBuckets:
+    """Token buckets shared by every worker, one upsert per request."""
+
+    async def take(self, key: str, limit: RouteLimit) -> float | None:
+        async with database.get_async_session() as session:
+            result = await session.execute(
+                TAKE_TOKEN, {"key": key, "rate": limit.rate, "burst": limit.burst}
+            )
+            allowed, tokens = result.one()
+            await session.commit()
+        if allowed:
+            return None
+        return (1 - tokens) / limit.rate
+
+
+def get_refill_secs() -> float:
+    """Time after which an idle bucket of any route is full again."""
+    return max(
+        limit.burst / limit.rate for limit in get_settings().rate_limits.routes.values()
+    )
+
+
+async def remove_full_buckets() -> int:
+    """Delete the shared buckets idle long enough to be full, return how many.
+
+    A missing bucket starts full, so dropping them loses nothing and keeps
+    the table to the clients seen recently.
+    """
+    async with database.get_async_session() as session:
+        locked = await session.scalar(
+            text("SELECT pg_try_advisory_xact_lock(:key)"),
+            {"key": CLEANUP_LOCK_KEY},
+        )
+        if not locked:
+            return 0
+        result = await session.execute(
+            delete(RateLimitBucket).where(
+                RateLimitBucket.updated_at
+                < func.clock_timestamp() - timedelta(seconds=get_refill_secs())
+            )
+        )
+        await session.commit()
+    return result.rowcount
+
+
+async def run_bucket_cleanup() -> None:
+    settings = get_settings().rate_limits
+    interval = settings.cleanup_interval_secs
+    while interval and settings.backend == "postgres":
+        await asyncio.sleep(interval)
+        try:
+            removed = await remove_full_buckets()
+        except Exception as e:
+            print(f"Error removing rate limit buckets: {e}")
+            continue
+        if removed:
+            print(f"Removed {removed} idle rate limit buckets.")
+
+
+class RouteMetrics(BaseModel):
+    allowed: int = 0
+    throttled: int = 0
+    shed: int = 0
+    in_flight: int = 0
+
+
+class RouteLimiter:
+    def __init__(self, route: str, limit: RouteLimit) -> None:
+        self.route = route
+        self.limit = limit
+        self.metrics = RouteMetrics()
+        self._semaphore = (
+            asyncio.Semaphore(limit.max_concurrency)
+            if limit.max_concurrency is not None
+            else None
+        )
+
+    async def take(self, client: str) -> float | None:
+        """Take a token for the client, return seconds to wait when throttled."""
+        retry_after = await get_buckets().take(f"{self.route}:{client}", self.limit)
+        if retry_after is not None:
+            self.metrics.throttled += 1
+        return retry_after
+
+    async def acquire(self) -> bool:
+        """Take a concurrency slot, waiting at most `max_wait_secs`."""
+        if self._semaphore is not None:
+            try:
+                await asyncio.wait_for(
+                    self._semaphore.acquire(), get_settings().rate_limits.max_wait_secs
+                )
+            except asyncio.TimeoutError:
+                self.metrics.shed += 1
+                return False
+        self.metrics.allowed += 1
+        self.metrics.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        self.metrics.in_flight -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+
+@lru_cache(maxsize=1)
+def get_buckets() -> MemoryBuckets | PostgresBuckets:
+    settings = get_settings().rate_limits
+    if settings.backend == "postgres":
+        return PostgresBuckets()
+    return MemoryBuckets(settings.max_keys)
+
+
+@lru_cache
+def get_route_limiter(route: str) -> RouteLimiter:
+    return RouteLimiter(route, get_settings().rate_limits.routes[route])
+
+
+def get_metrics() -> dict[str, RouteMetrics]:
+    return {
+        route: get_route_limiter(route).metrics
+        for route in get_settings().rate_limits.routes
+    }
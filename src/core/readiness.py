@@ -0,0 +1,91 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from pydantic import BaseModel
+
+from src.config import get_settings
+from src.core import database, s3
+
+
+class DependencyStatus(BaseModel):
+    healthy: bool
+    latency_ms: float | None = None
+    checked_at: float
+    error: str | None = None
+
+
+class Readiness:
+    """Warm-up and cached latency probes behind the readiness endpoint.
+
+    The warm-up lasts until every dependency answered, a pod that never
+    reached storage would only serve errors for uploads and images. Once
+    warmed up, only the database gates readiness. Storage is shared by every
+    pod, so failing readiness on a storage blip would pull all of them out of
+    rotation at once. Its latency and errors are only reported, and the
+    circuit breaker sheds the storage calls.
+    """
+
+    gating = {"database"}
+
+    def __init__(self) -> None:
+        self.warmed_up = False
+        self.dependencies: dict[str, DependencyStatus] = {}
+        self.probes: dict[str, Callable[[], Awaitable[None]]] = {
+            "database": database.ping,
+            "storage": s3.ping_storage,
+        }
+
+    @property
+    def ready(self) -> bool:
+        return self.warmed_up and all(
+            dependency.healthy
+            for name, dependency in self.dependencies.items()
+            if name in self.gating
+        )
+
+    async def probe(self, name: str, timeout: float) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.probes[name](), timeout)
+        except Exception as e:
+            self.dependencies[name] = DependencyStatus(
+                healthy=False, checked_at=time.time(), error=repr(e)
+            )
+        else:
+            self.dependencies[name] = DependencyStatus(
+                healthy=True,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                checked_at=time.time(),
+            )
+
+    async def check(self) -> None:
+        timeout = get_settings().server.readiness_timeout_secs
+        await asyncio.gather(*(self.probe(name, timeout) for name in self.probes))
+
+    async def warm_up(self) -> bool:
+        if get_settings().database.pool_warmup:
+            await database.warm_up()
+        await s3.open_shared_client()
+        await self.check()
+        self.warmed_up = all(
+            dependency.healthy for dependency in self.dependencies.values()
+        )
+        return self.warmed_up
+
+    async def run(self) -> None:
+        interval = get_settings().server.readiness_check_interval_secs
+        while not await self.warm_up():
+            unhealthy = [
+                name
+                for name, dependency in self.dependencies.items()
+                if not dependency.healthy
+            ]
+            print(f"Warm-up waiting for {', '.join(unhealthy)}.")
+            await asyncio.sleep(interval)
+        while True:
+            await asyncio.sleep(interval)
+            await self.check()
+
+
+READINESS = Readiness()
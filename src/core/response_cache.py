@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from functools import lru_cache
+from typing import Any
+
+from src.config import get_settings
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire, with single-flight loading.
+
+    Concurrent misses on a key share one load. The load runs in its own
+    task, so a caller going away does not cancel it for the others.
+    """
+
+    def __init__(self, max_entries: int, ttl_secs: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_secs = ttl_secs
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._loads: dict[Hashable, asyncio.Task] = {}
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_secs, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        # A load already in flight may have read the old row, keep it out.
+        self._loads.pop(key, None)
+
+    async def get_or_load(
+        self, key: Hashable, load: Callable[[], Awaitable[Any | None]]
+    ) -> Any | None:
+        value = self.get(key)
+        if value is not None:
+            return value
+        task = self._loads.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, load))
+            self._loads[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(
+        self, key: Hashable, load: Callable[[], Awaitable[Any | None]]
+    ) -> Any | None:
+        task = asyncio.current_task()
+        try:
+            value = await load()
+            if value is not None and self._loads.get(key) is task:
+                self.put(key, value)
+            return value
+        finally:
+            if self._loads.get(key) is task:
+                del self._loads[key]
+
+
+@lru_cache(maxsize=1)
+def get_public_meme_cache() -> TTLCache:
+    settings = get_settings().response_cache
+    return TTLCache(settings.max_entries, settings.ttl_secs)
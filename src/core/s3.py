@@ -1,10 +1,24 @@
+import asyncio
+import math
+import random
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import lru_cache
+from typing import Any, TypeVar
+from aiobotocore.client import AioBaseClient
+from aiobotocore.config import AioConfig
 from aiobotocore.session import ClientCreatorContext, get_session
-from botocore.exceptions import ClientError
-from minio.error import S3Error
+from botocore.exceptions import BotoCoreError, ClientError
 from fastapi import HTTPException, UploadFile
 import uuid
 
 from src.config import get_settings
+from src.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.core.image_cache import get_image_cache
+
+T = TypeVar("T")
+
+TRANSIENT_ERROR_CODES = {"SlowDown", "RequestTimeout", "ServiceUnavailable"}
 
 
 async def create_minio_client() -> ClientCreatorContext:
@@ -17,78 +31,359 @@ async def create_minio_client() -> ClientCreatorContext:
         aws_access_key_id=settings.minio.access_key_id,
         aws_secret_access_key=settings.minio.secret_access_key.get_secret_value(),
         use_ssl=False,
+        config=AioConfig(
+            max_pool_connections=settings.minio.max_pool_connections,
+            connect_timeout=settings.minio.connect_timeout_secs,
+            read_timeout=settings.minio.read_timeout_secs,
+            # Retries are done by call_storage, under its deadline and breaker.
+            retries={"total_max_attempts": 1},
+        ),
     )
 
 
+_SHARED_CLIENT_STACK = AsyncExitStack()
+_SHARED_CLIENT: AioBaseClient | None = None
+_BUCKET_READY = False
+
+
+async def open_shared_client() -> None:
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is None:
+        client = await create_minio_client()
+        _SHARED_CLIENT = await _SHARED_CLIENT_STACK.enter_async_context(client)
+
+
+async def close_shared_client() -> None:
+    global _SHARED_CLIENT
+    _SHARED_CLIENT = None
+    await _SHARED_CLIENT_STACK.aclose()
+
+
+@asynccontextmanager
+async def minio_client() -> AsyncIterator[AioBaseClient]:
+    """Yield the shared client opened in the lifespan, or a throwaway one."""
+    if _SHARED_CLIENT is not None:
+        yield _SHARED_CLIENT
+        return
+    async with await create_minio_client() as client:
+        yield client
+
+
+@lru_cache(maxsize=1)
+def get_storage_breaker() -> CircuitBreaker:
+    settings = get_settings().minio
+    return CircuitBreaker(
+        settings.breaker_failure_threshold, settings.breaker_reset_timeout_secs
+    )
+
+
+@lru_cache(maxsize=1)
+def get_storage_semaphore() -> asyncio.Semaphore:
+    return asyncio.Semaphore(get_settings().minio.max_concurrency)
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, ClientError):
+        status_code = error.response["ResponseMetadata"].get("HTTPStatusCode")
+        return (
+            status_code in (500, 502, 503, 504)
+            or error.response["Error"]["Code"] in TRANSIENT_ERROR_CODES
+        )
+    return isinstance(error, (BotoCoreError, asyncio.TimeoutError))
+
+
+async def call_storage(
+    operation: Callable[[AioBaseClient], Awaitable[T]],
+    client: AioBaseClient | None = None,
+) -> T:
+    """Run an idempotent S3 operation with a deadline, bounded concurrency,
+    jittered retries and the storage circuit breaker.
+
+    Errors from a reachable storage (missing keys, 304s, ...) are raised
+    straight away and count as successes for the breaker.
+    """
+    settings = get_settings().minio
+    breaker = get_storage_breaker()
+
+    async def attempt() -> T:
+        async with get_storage_semaphore():
+            if client is not None:
+                return await operation(client)
+            async with minio_client() as minio:
+                return await operation(minio)
+
+    for attempt_number in range(1, settings.max_attempts + 1):
+        try:
+            breaker.before_call()
+        except CircuitOpenError as e:
+            raise HTTPException(
+                status_code=503,
+                detail="Storage temporarily unavailable.",
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+
+        try:
+            result = await asyncio.wait_for(attempt(), settings.operation_timeout_secs)
+        except asyncio.CancelledError:
+            # Cancelled by the caller, which says nothing about the storage,
+            # but a half-open trial must not keep the circuit blocked.
+            breaker.release_trial()
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt_number == settings.max_attempts:
+                if isinstance(e, asyncio.TimeoutError):
+                    print(f"Storage operation timed out: {e!r}")
+                    raise HTTPException(status_code=503, detail="Storage timed out.")
+                raise
+            await asyncio.sleep(
+                random.uniform(0, settings.retry_backoff_secs * 2**attempt_number)
+            )
+        else:
+            breaker.record_success()
+            return result
+
+
+async def ensure_bucket_ready(client: AioBaseClient) -> None:
+    global _BUCKET_READY
+    if not _BUCKET_READY:
+        await ensure_bucket_exists(client, get_settings().minio.bucket_name)
+        _BUCKET_READY = True
+
+
+async def ping_storage() -> None:
+    async def ping(minio: AioBaseClient) -> None:
+        await ensure_bucket_ready(minio)
+        await minio.head_bucket(Bucket=get_settings().minio.bucket_name)
+
+    await call_storage(ping)
+
+
 async def ensure_bucket_exists(client: ClientCreatorContext, bucket_name: str) -> None:
+    """Create the bucket unless it is already ours.
+
+    Runs inside call_storage, so storage errors are raised as they are for
+    it to retry and count, the callers turn them into HTTP errors.
+    """
     try:
         await client.create_bucket(Bucket=bucket_name)
     except ClientError as e:
         error_code = e.response["Error"]["Code"]
         if error_code == "BucketAlreadyOwnedByYou":
-            pass
-        elif error_code == "BucketAlreadyExists":
-            raise HTTPException(
-                status_code=409, detail="Bucket name already in use by another account."
-            )
-        else:
-            print(f"Error checking/creating bucket: {e}")
-            raise HTTPException(
-                status_code=500, detail="Error checking/creating bucket."
-            )
-    except Exception as e:
-        print(f"Unexpected error when checking/creating bucket: {e}")
-        raise HTTPException(
-            status_code=500, detail="Unexpected error checking/creating bucket."
-        )
+            return
+        if error_code == "BucketAlreadyExists":
+            print(f"Bucket name {bucket_name} already in use by another account.")
+        raise
 
 
 async def get_image_url(
     file_path: str,
-    bucket_name: str = get_settings().minio.bucket_name,
+    bucket_name: str | None = None,
     expires: int = 900,
 ) -> str:
-    client = await create_minio_client()
+    if bucket_name is None:
+        bucket_name = get_settings().minio.bucket_name
     try:
-        async with client as minio:
+        async with minio_client() as minio:
             presigned_url = await minio.generate_presigned_url(
                 "get_object",
                 Params={"Bucket": bucket_name, "Key": file_path},
                 ExpiresIn=expires,
             )
         return presigned_url
-    except S3Error as e:
+    except (BotoCoreError, ClientError) as e:
         print(f"Error getting image URL: {e}")
         raise HTTPException(status_code=500, detail="Error getting image URL.")
 
 
+async def get_image_urls(
+    file_paths: list[str],
+    bucket_name: str | None = None,
+    expires: int = 900,
+) -> list[str]:
+    if bucket_name is None:
+        bucket_name = get_settings().minio.bucket_name
+    try:
+        async with minio_client() as minio:
+            return await asyncio.gather(
+                *(
+                    minio.generate_presigned_url(
+                        "get_object",
+                        Params={"Bucket": bucket_name, "Key": file_path},
+                        ExpiresIn=expires,
+                    )
+                    for file_path in file_paths
+                )
+            )
+    except (BotoCoreError, ClientError) as e:
+        print(f"Error getting image URLs: {e}")
+        raise HTTPException(status_code=500, detail="Error getting image URLs.")
+
+
+async def get_image_stream(
+    file_path: str,
+    byte_range: str | None = None,
+    if_none_match: str | None = None,
+) -> tuple[dict[str, Any], AsyncIterator[bytes]]:
+    settings = get_settings()
+    stack = AsyncExitStack()
+    minio = await stack.enter_async_context(minio_client())
+    params = {"Bucket": settings.minio.bucket_name, "Key": file_path}
+    if byte_range is not None:
+        params["Range"] = byte_range
+    if if_none_match is not None:
+        params["IfNoneMatch"] = if_none_match
+
+    try:
+        s3_object = await call_storage(
+            lambda client: client.get_object(**params), client=minio
+        )
+    except ClientError as e:
+        await stack.aclose()
+        error_code = e.response["Error"]["Code"]
+        if e.response["ResponseMetadata"].get("HTTPStatusCode") == 304:
+            raise HTTPException(status_code=304, headers={"ETag": if_none_match})
+        elif error_code == "NoSuchKey":
+            raise HTTPException(status_code=404, detail="Image not found.")
+        elif error_code == "InvalidRange":
+            raise HTTPException(status_code=416, detail="Range not satisfiable.")
+        print(f"Error getting image: {e}")
+        raise HTTPException(status_code=500, detail="Error getting image.")
+    except BaseException:
+        await stack.aclose()
+        raise
+
+    async def chunks() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in s3_object["Body"].iter_chunks(
+                settings.image_cache.chunk_size
+            ):
+                yield chunk
+        finally:
+            s3_object["Body"].close()
+            await stack.aclose()
+
+    return s3_object, chunks()
+
+
+def new_image_path(filename: str) -> str:
+    return f"{uuid.uuid4()}/{filename}"
+
+
 async def upload_image(file: UploadFile) -> str:
     try:
-        client = await create_minio_client()
         bucket_name = get_settings().minio.bucket_name
-        file_path = f"{uuid.uuid4()}/{file.filename}"
+        file_path = new_image_path(file.filename)
+        data = file.file.read()
 
-        async with client as minio:
-            await ensure_bucket_exists(minio, bucket_name)
+        # The key is fresh, so retrying the PUT is idempotent.
+        async def upload(minio: AioBaseClient) -> None:
+            await ensure_bucket_ready(minio)
             await minio.put_object(
                 Bucket=bucket_name,
                 Key=file_path,
-                Body=file.file.read(),
+                Body=data,
                 ContentType=file.content_type,
             )
+
+        await call_storage(upload)
         return file_path
-    except S3Error as e:
+    except (BotoCoreError, ClientError) as e:
+        print(f"Error uploading image: {e}")
+        raise HTTPException(status_code=500, detail="Error uploading image.")
+
+
+async def create_upload_policy(file_path: str, content_type: str) -> dict[str, Any]:
+    settings = get_settings()
+    try:
+        async with minio_client() as minio:
+            await ensure_bucket_ready(minio)
+            return await minio.generate_presigned_post(
+                Bucket=settings.minio.bucket_name,
+                Key=file_path,
+                Fields={"Content-Type": content_type},
+                Conditions=[
+                    {"Content-Type": content_type},
+                    ["content-length-range", 1, settings.minio.upload_max_size_bytes],
+                ],
+                ExpiresIn=settings.minio.upload_expire_secs,
+            )
+    except (BotoCoreError, ClientError) as e:
+        print(f"Error creating upload policy: {e}")
+        raise HTTPException(status_code=500, detail="Error creating upload policy.")
+
+
+async def copy_image(source_path: str, file_path: str) -> None:
+    bucket_name = get_settings().minio.bucket_name
+    try:
+        await call_storage(
+            lambda minio: minio.copy_object(
+                Bucket=bucket_name,
+                Key=file_path,
+                CopySource={"Bucket": bucket_name, "Key": source_path},
+            )
+        )
+    except (BotoCoreError, ClientError) as e:
+        print(f"Error copying image: {e}")
+        raise HTTPException(status_code=500, detail="Error copying image.")
+
+
+async def head_image(file_path: str) -> dict[str, Any] | None:
+    try:
+        return await call_storage(
+            lambda minio: minio.head_object(
+                Bucket=get_settings().minio.bucket_name, Key=file_path
+            )
+        )
+    except ClientError as e:
+        if e.response["ResponseMetadata"].get("HTTPStatusCode") == 404:
+            return None
+        print(f"Error checking image: {e}")
+        raise HTTPException(status_code=500, detail="Error checking image.")
+
+
+async def download_image(file_path: str) -> bytes:
+    async def download(minio: AioBaseClient) -> bytes:
+        s3_object = await minio.get_object(
+            Bucket=get_settings().minio.bucket_name, Key=file_path
+        )
+        async with s3_object["Body"] as body:
+            return await body.read()
+
+    try:
+        return await call_storage(download)
+    except (BotoCoreError, ClientError) as e:
+        print(f"Error downloading image: {e}")
+        raise HTTPException(status_code=500, detail="Error downloading image.")
+
+
+async def put_image(file_path: str, data: bytes, content_type: str) -> None:
+    try:
+        await call_storage(
+            lambda minio: minio.put_object(
+                Bucket=get_settings().minio.bucket_name,
+                Key=file_path,
+                Body=data,
+                ContentType=content_type,
+            )
+        )
+    except (BotoCoreError, ClientError) as e:
         print(f"Error uploading image: {e}")
         raise HTTPException(status_code=500, detail="Error uploading image.")
 
 
 async def delete_image(file_path: str) -> None:
     try:
-        client = await create_minio_client()
-        async with client as minio:
-            await minio.delete_object(
+        await call_storage(
+            lambda minio: minio.delete_object(
                 Bucket=get_settings().minio.bucket_name, Key=file_path
             )
-    except S3Error as e:
+        )
+        if get_settings().image_cache.enabled:
+            await get_image_cache().discard(file_path)
+    except (BotoCoreError, ClientError) as e:
         print(f"Failed to delete image from MINIO: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete image")
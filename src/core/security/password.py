@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import bcrypt
 
 from src.config import get_settings
@@ -16,4 +18,6 @@ def get_password_hash(password: str) -> str:
     ).decode()
 
 
-DUMMY_PASSWORD = get_password_hash("")
+@lru_cache(maxsize=1)
+def get_dummy_password_hash() -> str:
+    return get_password_hash("")
@@ -0,0 +1,248 @@
+import asyncio
+
+from sqlalchemy import (
+    ColumnElement,
+    Delete,
+    Select,
+    and_,
+    delete,
+    literal,
+    not_,
+    select,
+    text,
+    true,
+    tuple_,
+    union,
+)
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import aliased
+
+from src.api.models import Follow, Meme, TimelineEntry, User
+from src.config import get_settings
+from src.core import database
+
+# Arbitrary key shared by all workers so only one of them trims at a time.
+TRIM_LOCK_KEY = 35_002
+
+
+def trim_timelines(user_ids: Select) -> Delete:
+    """DELETE everything past the newest `max_length` entries of each timeline.
+
+    The cutoff is looked up once per user, by a LATERAL scan of the timeline
+    primary key that only yields a row for timelines over the limit.
+    """
+    users = user_ids.subquery("users")
+    newest = aliased(TimelineEntry)
+    cutoff = (
+        select(newest.meme_id)
+        .where(newest.user_id == users.c[0])
+        .order_by(newest.meme_id.desc())
+        .offset(get_settings().timeline.max_length)
+        .limit(1)
+        .lateral("cutoff")
+    )
+    over_limit = (
+        select(users.c[0].label("user_id"), cutoff.c.meme_id)
+        .select_from(users.join(cutoff, true()))
+        .subquery("over_limit")
+    )
+    return delete(TimelineEntry).where(
+        TimelineEntry.user_id == over_limit.c.user_id,
+        TimelineEntry.meme_id <= over_limit.c.meme_id,
+    )
+
+
+async def trim_all_timelines() -> int:
+    """Trim every timeline in batches of users, return the entries deleted.
+
+    Returns early if another worker holds the lock of a batch, it is
+    trimming at the same time.
+    """
+    settings = get_settings().timeline
+    trimmed = 0
+    after_id = None
+    while True:
+        batch = (
+            select(User.user_id).order_by(User.user_id).limit(settings.trim_batch_size)
+        )
+        if after_id is not None:
+            batch = batch.where(User.user_id > after_id)
+        async with database.get_async_session() as session:
+            locked = await session.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"),
+                {"key": TRIM_LOCK_KEY},
+            )
+            if not locked:
+                return trimmed
+            user_ids = (await session.scalars(batch)).all()
+            if not user_ids:
+                return trimmed
+            result = await session.execute(
+                trim_timelines(select(User.user_id).where(User.user_id.in_(user_ids)))
+            )
+            await session.commit()
+        trimmed += result.rowcount
+        after_id = user_ids[-1]
+
+
+async def run_timeline_trimming() -> None:
+    """Fan-out only appends, timelines are cut back to length periodically."""
+    interval = get_settings().timeline.trim_interval_secs
+    while interval:
+        await asyncio.sleep(interval)
+        try:
+            trimmed = await trim_all_timelines()
+        except Exception as e:
+            print(f"Error trimming timelines: {e}")
+            continue
+        if trimmed:
+            print(f"Trimmed {trimmed} timeline entries.")
+
+
+def backfill_timeline(user_id: str, followee_id: str) -> Insert:
+    """INSERT the recent public memes of a newly followed user."""
+    recent = (
+        select(literal(user_id, TimelineEntry.user_id.type), Meme.id, Meme.owner_id)
+        .where(Meme.owner_id == followee_id, Meme.visibility.is_(True))
+        .order_by(Meme.id.desc())
+        .limit(get_settings().timeline.max_length)
+    )
+    return (
+        insert(TimelineEntry)
+        .from_select(["user_id", "meme_id", "meme_owner_id"], recent)
+        .on_conflict_do_nothing()
+    )
+
+
+def fans_out(follower_count: ColumnElement[int]) -> ColumnElement[bool]:
+    """Whether an account with that many followers is fanned out on write."""
+    return follower_count <= get_settings().timeline.fan_out_max_followers
+
+
+def stopped_pulling(
+    seen_count: ColumnElement[int], follower_count: ColumnElement[int]
+) -> ColumnElement[bool]:
+    """Whether a follower count change moved an account back to fan-out on write.
+
+    Its memes posted in the meantime were pulled at read time and never
+    fanned out, they are backfilled instead of vanishing from the timelines.
+    """
+    return and_(not_(fans_out(seen_count)), fans_out(follower_count))
+
+
+async def fan_out_meme(meme_id: int, owner_id: str) -> None:
+    """Add a public meme to the timelines of its owner's followers.
+
+    Run by the job queue, a meme deleted or made private in the meantime is
+    skipped.
+    """
+    async with database.get_async_session() as session:
+        await session.execute(
+            insert(TimelineEntry)
+            .from_select(
+                ["user_id", "meme_id", "meme_owner_id"],
+                select(Follow.follower_id, Meme.id, Meme.owner_id)
+                .join(Meme, Meme.owner_id == Follow.followee_id)
+                .join(User, User.user_id == Meme.owner_id)
+                .where(
+                    Meme.id == meme_id,
+                    Meme.owner_id == owner_id,
+                    Meme.visibility.is_(True),
+                    # Followers of large accounts pull their memes at read time.
+                    fans_out(User.follower_count),
+                ),
+            )
+            .on_conflict_do_nothing()
+        )
+        await session.commit()
+
+
+async def backfill_follower_timelines(owner_id: str) -> int:
+    """Add the recent public memes of an account to all its followers' timelines.
+
+    Runs in batches of followers, return the entries added. Nothing to do if
+    the account is pulled at read time again.
+    """
+    settings = get_settings().timeline
+    added = 0
+    after_id = None
+    while True:
+        recent = (
+            select(Meme.id, Meme.owner_id)
+            .join(User, User.user_id == Meme.owner_id)
+            .where(
+                Meme.owner_id == owner_id,
+                Meme.visibility.is_(True),
+                fans_out(User.follower_count),
+            )
+            .order_by(Meme.id.desc())
+            .limit(settings.max_length)
+            .cte("recent")
+        )
+        followers = (
+            select(Follow.follower_id)
+            .where(Follow.followee_id == owner_id)
+            .order_by(Follow.follower_id)
+            .limit(settings.trim_batch_size)
+        )
+        if after_id is not None:
+            followers = followers.where(Follow.follower_id > after_id)
+        async with database.get_async_session() as session:
+            follower_ids = (await session.scalars(followers)).all()
+            if not follower_ids:
+                return added
+            result = await session.execute(
+                insert(TimelineEntry)
+                .from_select(
+                    ["user_id", "meme_id", "meme_owner_id"],
+                    select(Follow.follower_id, recent.c.id, recent.c.owner_id)
+                    .join(recent, true())
+                    .where(
+                        Follow.followee_id == owner_id,
+                        Follow.follower_id.in_(follower_ids),
+                    ),
+                )
+                .on_conflict_do_nothing()
+            )
+            await session.commit()
+        added += result.rowcount
+        after_id = follower_ids[-1]
+
+
+def home_timeline(user_id: str, before_id: int | None, limit: int) -> Select:
+    """Merge the fanned-out timeline with memes pulled from large accounts.
+
+    Both branches are range scans, over the timeline primary key and over
+    (owner_id, id) of the followed large accounts.
+    """
+    fanned_out = select(
+        TimelineEntry.meme_id.label("id"), TimelineEntry.meme_owner_id.label("owner_id")
+    ).where(TimelineEntry.user_id == user_id)
+    large_accounts = (
+        select(Follow.followee_id)
+        .join(User, User.user_id == Follow.followee_id)
+        .where(
+            Follow.follower_id == user_id,
+            not_(fans_out(User.follower_count)),
+        )
+    )
+    pulled = select(Meme.id, Meme.owner_id).where(
+        Meme.owner_id.in_(large_accounts), Meme.visibility.is_(True)
+    )
+    if before_id is not None:
+        fanned_out = fanned_out.where(TimelineEntry.meme_id < before_id)
+        pulled = pulled.where(Meme.id < before_id)
+
+    ids = union(
+        fanned_out.order_by(TimelineEntry.meme_id.desc()).limit(limit),
+        pulled.order_by(Meme.id.desc()).limit(limit),
+    ).subquery()
+    return (
+        select(Meme)
+        .where(
+            tuple_(Meme.id, Meme.owner_id).in_(select(ids.c.id, ids.c.owner_id)),
+            Meme.visibility.is_(True),
+        )
+        .order_by(Meme.id.desc())
+        .limit(limit)
+    )
@@ -0,0 +1,37 @@
+import os
+import resource
+import time
+
+from src.config import get_settings
+
+# Reset by the lifespan, the import may have happened in the gunicorn master.
+_started_at = time.time()
+
+
+def mark_started() -> None:
+    global _started_at
+    _started_at = time.time()
+
+
+def get_uptime_secs() -> float:
+    return time.time() - _started_at
+
+
+def get_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current RSS, but good enough outside Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get_cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def get_worker_count() -> int:
+    return get_settings().server.workers or get_cpu_count()
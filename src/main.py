@@ -1,8 +1,90 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .api.endpoints.api_router import users_router, auth_router, meme_router
+from .api.endpoints.api_router import (
+    users_router,
+    auth_router,
+    meme_router,
+    follow_router,
+    event_router,
+    image_router,
+    health_router,
+)
 from .config import get_settings
+from .core import database, s3
+from .core.counters import VIEW_COUNTER, run_counter_reconciliation
+from .core.events import BROADCASTER
+from .core.image_cache import get_image_cache
+from .core.image_hash import get_hash_index
+from .core.image_variants import shutdown_process_pool
+from .core.jobs import JOB_RUNNER
+from .core.rate_limit import run_bucket_cleanup
+from .core.readiness import READINESS
+from .core.timeline import run_timeline_trimming
+from .core.security.password import get_dummy_password_hash
+from .core.worker import mark_started
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    mark_started()
+    # Hashed up front so the first login with an unknown email does not pay
+    # for it, a timing difference that would reveal the email is unknown.
+    await asyncio.to_thread(get_dummy_password_hash)
+    if get_settings().image_cache.enabled:
+        # Scans the cache directory, kept off the event loop.
+        await asyncio.to_thread(get_image_cache)
+    readiness_checks = asyncio.create_task(READINESS.run())
+    health_checks = asyncio.create_task(
+        database.get_replica_set().run_health_checks(
+            get_settings().database.replica_health_check_interval_secs
+        )
+    )
+    counter_reconciliation = asyncio.create_task(run_counter_reconciliation())
+    timeline_trimming = asyncio.create_task(run_timeline_trimming())
+    bucket_cleanup = asyncio.create_task(run_bucket_cleanup())
+    view_counting = asyncio.create_task(
+        VIEW_COUNTER.run(get_settings().view_counters.flush_interval_secs)
+    )
+    events = None
+    # Also carries the cross-worker response cache invalidation.
+    if get_settings().events.enabled or get_settings().response_cache.enabled:
+        events = asyncio.create_task(BROADCASTER.run())
+    hash_index = None
+    if get_settings().image_hash.enabled:
+        hash_index = asyncio.create_task(
+            get_hash_index().run(
+                get_settings().image_hash.refresh_interval_secs,
+                get_settings().image_hash.full_reload_interval_secs,
+                get_settings().image_hash.refresh_overlap_ids,
+            )
+        )
+    jobs = None
+    if get_settings().jobs.enabled:
+        jobs = asyncio.create_task(JOB_RUNNER.run())
+    yield
+    if jobs is not None:
+        jobs.cancel()
+    if events is not None:
+        events.cancel()
+    if hash_index is not None:
+        hash_index.cancel()
+    view_counting.cancel()
+    # Let the counter flush what is still buffered before the pool is disposed.
+    await asyncio.gather(view_counting, return_exceptions=True)
+    readiness_checks.cancel()
+    health_checks.cancel()
+    counter_reconciliation.cancel()
+    timeline_trimming.cancel()
+    bucket_cleanup.cancel()
+    await s3.close_shared_client()
+    await database.dispose()
+    shutdown_process_pool()
+
 
 app = FastAPI(
     title="meme-store",
@@ -10,11 +92,18 @@ app = FastAPI(
     description="Meme store using s3 storage",
     openapi_url="/openapi.json",
     docs_url="/",
+    lifespan=lifespan,
 )
 
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(meme_router)
+app.include_router(follow_router)
+app.include_router(health_router)
+if get_settings().events.enabled:
+    app.include_router(event_router)
+if get_settings().image_cache.enabled:
+    app.include_router(image_router)
 
 
 app.add_middleware(
@@ -26,4 +115,5 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
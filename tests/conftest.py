@@ -0,0 +1,54 @@
+import asyncio
+import os
+
+import asyncpg
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import URL
+
+from src.config import PROJECT_DIR, get_settings
+
+# Settings without defaults, the tests never reach these services.
+os.environ.setdefault("SECURITY__JWT_SECRET_KEY", "secret")
+os.environ.setdefault("SECURITY__PASSWORD_BCRYPT_ROUNDS", "4")
+os.environ.setdefault("DATABASE__PASSWORD", "postgres")
+os.environ.setdefault("MINIO__ENDPOINT_URL", "http://localhost:9000")
+os.environ.setdefault("MINIO__ACCESS_KEY_ID", "admin12345")
+os.environ.setdefault("MINIO__SECRET_ACCESS_KEY", "admin12345")
+os.environ.setdefault("MINIO__BUCKET_NAME", "memes")
+# Integration tests get their own database, created and migrated on first
+# use, and are skipped when no PostgreSQL server is reachable.
+os.environ.setdefault("DATABASE__DB", "meme_store_test")
+
+
+async def create_database(url: URL) -> None:
+    connection = await asyncpg.connect(
+        host=url.host,
+        port=url.port,
+        user=url.username,
+        password=url.password,
+        database="postgres",
+        timeout=5,
+    )
+    try:
+        exists = await connection.fetchval(
+            "SELECT 1 FROM pg_database WHERE datname = $1", url.database
+        )
+        if not exists:
+            await connection.execute(f'CREATE DATABASE "{url.database}"')
+    finally:
+        await connection.close()
+
+
+@pytest.fixture(scope="session")
+def database_url() -> URL:
+    url = get_settings().sqlalchemy_database_uri
+    try:
+        asyncio.run(create_database(url))
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+        pytest.skip(f"PostgreSQL is not reachable: {e}")
+    config = Config(str(PROJECT_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(PROJECT_DIR / "alembic"))
+    command.upgrade(config, "head")
+    return url
@@ -0,0 +1,14 @@
+from scripts.bench_pool import parse_pool, percentile
+
+
+def test_parse_pool() -> None:
+    assert parse_pool("20:40") == (20, 40)
+    assert parse_pool("5") == (5, 0)
+
+
+def test_percentile() -> None:
+    timings = [float(ms) for ms in range(1, 101)]
+
+    assert percentile(timings, 0.99) == 100.0
+    assert percentile(timings, 0.5) == 51.0
+    assert percentile([3.0], 0.99) == 3.0
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+from src.config import get_settings
+from src.core import s3
+from src.core.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def breaker(monkeypatch: pytest.MonkeyPatch) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_secs=30.0)
+    monkeypatch.setattr(s3, "get_storage_breaker", lambda: breaker)
+    s3.get_storage_semaphore.cache_clear()
+    return breaker
+
+
+def half_open(breaker: CircuitBreaker) -> None:
+    breaker.record_failure()
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout_secs
+
+
+async def succeed(client: object) -> str:
+    return "ok"
+
+
+async def hang(client: object) -> str:
+    await asyncio.sleep(60)
+    return "late"
+
+
+def test_open_circuit_rejects_calls(breaker: CircuitBreaker) -> None:
+    breaker.record_failure()
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(s3.call_storage(succeed, client=object()))
+
+    assert error.value.status_code == 503
+
+
+def test_successful_trial_closes_circuit(breaker: CircuitBreaker) -> None:
+    half_open(breaker)
+
+    assert asyncio.run(s3.call_storage(succeed, client=object())) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_cancelled_trial_releases_half_open_slot(breaker: CircuitBreaker) -> None:
+    half_open(breaker)
+
+    async def cancel_trial_then_call() -> str:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(s3.call_storage(hang, client=object()), 0.01)
+        assert breaker.state == "half_open"
+        return await s3.call_storage(succeed, client=object())
+
+    assert asyncio.run(cancel_trial_then_call()) == "ok"
+    assert breaker.state == "closed"
+
+
+class BucketClient:
+    """Fails creating the bucket with the given errors, then succeeds."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def create_bucket(self, Bucket: str) -> None:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+def client_error(code: str, status_code: int) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status_code}},
+        "CreateBucket",
+    )
+
+
+def test_bucket_creation_errors_are_retried_by_call_storage(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout_secs=30.0)
+    monkeypatch.setattr(s3, "get_storage_breaker", lambda: breaker)
+    monkeypatch.setattr(get_settings().minio, "retry_backoff_secs", 0.0)
+    s3.get_storage_semaphore.cache_clear()
+    client = BucketClient(client_error("ServiceUnavailable", 503))
+
+    asyncio.run(
+        s3.call_storage(
+            lambda minio: s3.ensure_bucket_exists(minio, "memes"), client=client
+        )
+    )
+
+    assert client.calls == 2
+
+
+def test_bucket_already_owned_is_not_an_error() -> None:
+    client = BucketClient(client_error("BucketAlreadyOwnedByYou", 409))
+
+    asyncio.run(s3.ensure_bucket_exists(client, "memes"))
+
+
+def test_bucket_creation_errors_are_not_http_errors() -> None:
+    client = BucketClient(client_error("AccessDenied", 403))
+
+    with pytest.raises(ClientError):
+        asyncio.run(s3.ensure_bucket_exists(client, "memes"))
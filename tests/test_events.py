@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import insert, update
+
+from src.api.models import Meme, User
+from src.config import get_settings
+from src.core import database, events
+from src.core.events import MemeBroadcaster
+from src.core.response_cache import get_public_meme_cache
+
+
+def test_cache_invalidated_across_workers_without_events(
+    database_url, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(get_settings().events, "enabled", False)
+    monkeypatch.setattr(get_settings().response_cache, "enabled", True)
+    cache = get_public_meme_cache()
+    broadcaster = MemeBroadcaster()
+
+    async def scenario() -> None:
+        user_id = str(uuid.uuid4())
+        async with database.get_async_session() as session:
+            await session.execute(
+                insert(User).values(
+                    user_id=user_id,
+                    email=f"{user_id}@test.invalid",
+                    hashed_password="x",
+                )
+            )
+            meme_id = await session.scalar(
+                insert(Meme)
+                .values(
+                    description="meme",
+                    image_url=f"memes/{uuid.uuid4()}",
+                    visibility=True,
+                    owner_id=user_id,
+                )
+                .returning(Meme.id)
+            )
+            await session.commit()
+
+        listening = asyncio.create_task(broadcaster.run())
+        try:
+            while broadcaster._connection is None:
+                await asyncio.sleep(0.01)
+            # Let the LISTEN commands reach the server.
+            await asyncio.sleep(0.2)
+            cache.put((user_id, meme_id), "cached")
+            async with database.get_async_session() as session:
+                await session.execute(
+                    update(Meme).where(Meme.id == meme_id).values(description="new")
+                )
+                await session.commit()
+            for _ in range(100):
+                if cache.get((user_id, meme_id)) is None:
+                    break
+                await asyncio.sleep(0.02)
+            assert cache.get((user_id, meme_id)) is None
+        finally:
+            listening.cancel()
+            await asyncio.gather(listening, return_exceptions=True)
+            await database.dispose()
+
+    asyncio.run(scenario())
+
+
+class FailingConnection:
+    def __init__(self) -> None:
+        self.terminated = False
+
+    def add_termination_listener(self, callback) -> None:
+        pass
+
+    async def add_listener(self, channel: str, callback) -> None:
+        raise ConnectionResetError("connection lost")
+
+    def terminate(self) -> None:
+        self.terminated = True
+
+
+def test_connection_closed_when_listen_fails(monkeypatch: pytest.MonkeyPatch) -> None:
+    connections = []
+
+    async def connect(dsn: str) -> FailingConnection:
+        connections.append(FailingConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(events.asyncpg, "connect", connect)
+    monkeypatch.setattr(get_settings().events, "reconnect_delay_secs", 0.01)
+    broadcaster = MemeBroadcaster()
+
+    async def scenario() -> None:
+        listening = asyncio.create_task(broadcaster.run())
+        while len(connections) < 3:
+            await asyncio.sleep(0.01)
+        listening.cancel()
+        await asyncio.gather(listening, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert all(connection.terminated for connection in connections)
+    assert broadcaster._connection is None
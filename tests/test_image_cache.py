@@ -0,0 +1,58 @@
+import asyncio
+import os
+from pathlib import Path
+
+import anyio
+
+from src.core.image_cache import (
+    DiskLRUCache,
+    lock_worker_directory,
+    read_file_chunks,
+    remove_dead_worker_caches,
+)
+
+
+def cache_with_entry(directory: Path, key: str, data: bytes) -> DiskLRUCache:
+    cache = DiskLRUCache(directory, max_size_bytes=1024)
+    cache.load()
+    temp_path = cache.new_temp_path()
+    temp_path.write_bytes(data)
+    asyncio.run(cache.put(key, temp_path, etag='"etag"', content_type="image/png"))
+    return cache
+
+
+def test_dead_worker_caches_are_removed(tmp_path: Path) -> None:
+    live = lock_worker_directory(tmp_path / "live")
+    # Exited workers, their lock is gone with them whoever reuses the pid.
+    os.close(lock_worker_directory(tmp_path / "dead"))
+    (tmp_path / str(os.getpid())).mkdir()
+
+    remove_dead_worker_caches(tmp_path)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["live", "live.lock"]
+    os.close(live)
+
+
+def test_evicted_files_are_removed(tmp_path: Path) -> None:
+    cache = cache_with_entry(tmp_path, "uploads/a.png", b"a" * 600)
+    temp_path = cache.new_temp_path()
+    temp_path.write_bytes(b"b" * 600)
+
+    asyncio.run(cache.put("uploads/b.png", temp_path, '"b"', "image/png"))
+
+    assert cache.get("uploads/a.png") is None
+    assert cache.size_bytes == 600
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_open_entry_stays_readable_after_eviction(tmp_path: Path) -> None:
+    cache = cache_with_entry(tmp_path, "uploads/a.png", b"0123456789")
+    entry = cache.get("uploads/a.png")
+
+    async def read() -> bytes:
+        file = await anyio.open_file(entry.path, "rb")
+        await cache.discard("uploads/a.png")
+        return b"".join([chunk async for chunk in read_file_chunks(file, 2, 5, 2)])
+
+    assert asyncio.run(read()) == b"2345"
+    assert cache.get("uploads/a.png") is None
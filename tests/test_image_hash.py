@@ -0,0 +1,79 @@
+import asyncio
+from collections import namedtuple
+from contextlib import asynccontextmanager
+
+import pytest
+
+from src.core import hash_index
+from src.core.hash_index import HashIndex
+
+Row = namedtuple("Row", ["id", "phash"])
+
+
+class FakeResult:
+    def __init__(self, rows: list[Row]) -> None:
+        self.rows = rows
+
+    async def partitions(self):
+        for start in range(0, len(self.rows), 2):
+            yield self.rows[start : start + 2]
+
+
+class FakeSession:
+    def __init__(self, rows: list[Row]) -> None:
+        self.rows = rows
+
+    async def scalar(self, statement: object) -> int:
+        return len(self.rows)
+
+    async def stream(self, statement: object) -> FakeResult:
+        after_id = statement.whereclause.clauses[-1].right.value
+        return FakeResult([row for row in self.rows if row.id > after_id])
+
+
+@pytest.fixture
+def rows(monkeypatch: pytest.MonkeyPatch) -> list[Row]:
+    rows = [Row(1, 0b1111), Row(2, -1), Row(3, 0)]
+
+    @asynccontextmanager
+    async def read_session():
+        yield FakeSession(rows)
+
+    monkeypatch.setattr(hash_index.database, "get_async_read_session", read_session)
+    return rows
+
+
+def test_reload_streams_every_public_hash(rows: list[Row]) -> None:
+    index = HashIndex()
+
+    asyncio.run(index.reload())
+
+    assert len(index) == 3
+    assert index.search(0, 4, 10) == [(3, 0), (1, 4)]
+    assert index.search(-1, 0, 10) == [(2, 0)]
+
+
+def test_incremental_load_reads_new_ids_once(rows: list[Row]) -> None:
+    index = HashIndex()
+    asyncio.run(index.reload())
+    index.add(5, 0b1)
+    rows += [Row(4, 0b11), Row(5, 0b1)]
+
+    asyncio.run(index.load(after_id=3))
+
+    assert len(index) == 5
+    assert [meme_id for meme_id, _ in index.search(0, 2, 10)] == [3, 5, 4]
+
+
+def test_overlap_picks_up_late_commits_once(rows: list[Row]) -> None:
+    index = HashIndex()
+    asyncio.run(index.reload())
+    rows.append(Row(5, 0b1))
+    asyncio.run(index.load(after_id=3))
+    # Id 4 was taken before 5 but committed after 5 was loaded.
+    rows.append(Row(4, 0b11))
+
+    asyncio.run(index.load(after_id=0))
+
+    assert len(index) == 5
+    assert [meme_id for meme_id, _ in index.search(0, 2, 10)] == [3, 5, 4]
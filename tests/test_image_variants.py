@@ -0,0 +1,25 @@
+import pytest
+
+from src.core import image_variants
+from src.core.image_variants import get_pool_size
+
+
+@pytest.fixture
+def cpus(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(image_variants, "get_cpu_count", lambda: 8)
+
+
+def test_pool_splits_cpus_between_workers(
+    cpus: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(image_variants, "get_worker_count", lambda: 4)
+
+    assert get_pool_size() == 2
+
+
+def test_pool_keeps_one_process_with_a_worker_per_cpu(
+    cpus: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(image_variants, "get_worker_count", lambda: 8)
+
+    assert get_pool_size() == 1
@@ -0,0 +1,12 @@
+from src.api.models import Job
+from src.core.jobs import image_cleanup_key
+
+
+def test_image_cleanup_key_fits_column() -> None:
+    long_path = "uploads/" + "x" * 2000 + ".png"
+
+    key = image_cleanup_key(long_path)
+
+    assert len(key) <= Job.__table__.c.idempotency_key.type.length
+    assert key == image_cleanup_key(long_path)
+    assert key != image_cleanup_key(long_path + "x")
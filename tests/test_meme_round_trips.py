@@ -0,0 +1,217 @@
+import asyncio
+import io
+import uuid
+from collections.abc import Awaitable, Callable
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+from sqlalchemy import URL, delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.api.endpoints import memes
+from src.api.models import Job, Meme, User
+from src.core.jobs import FAN_OUT_MEME, image_cleanup_key
+
+
+class RoundTrips:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+        self.commits = 0
+
+    def reset(self) -> None:
+        self.statements.clear()
+        self.commits = 0
+
+
+def run(
+    url: URL, scenario: Callable[[AsyncSession, RoundTrips, User], Awaitable[None]]
+) -> None:
+    async def main() -> None:
+        engine = create_async_engine(url)
+        round_trips = RoundTrips()
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def count_statement(conn, cursor, statement, *args) -> None:
+            round_trips.statements.append(statement)
+
+        @event.listens_for(engine.sync_engine, "commit")
+        def count_commit(conn) -> None:
+            round_trips.commits += 1
+
+        user_id = str(uuid.uuid4())
+        user = User(
+            user_id=user_id,
+            email=f"{uuid.uuid4()}@test.invalid",
+            hashed_password="x",
+        )
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                session.add(user)
+                await session.commit()
+                round_trips.reset()
+                await scenario(session, round_trips, user)
+                await session.execute(delete(User).where(User.user_id == user_id))
+                await session.commit()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+def upload(name: str = "meme.png") -> UploadFile:
+    return UploadFile(io.BytesIO(b"image"), filename=name)
+
+
+async def add(session: AsyncSession, user: User, visibility: bool = True) -> Meme:
+    return await memes.add_meme(
+        background_tasks=BackgroundTasks(),
+        description="meme",
+        visibility=visibility,
+        image=upload(),
+        tags=["cat"],
+        session=session,
+        current_user=user,
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_storage(monkeypatch):
+    async def upload_image(image: UploadFile) -> str:
+        return f"memes/{uuid.uuid4()}/{image.filename}"
+
+    async def hash_upload(image: UploadFile, exclude_id: int | None = None) -> None:
+        return None
+
+    monkeypatch.setattr(memes, "upload_image", upload_image)
+    monkeypatch.setattr(memes, "hash_upload", hash_upload)
+
+
+def test_add_meme_is_one_statement(database_url):
+    async def scenario(session, round_trips, user):
+        meme = await add(session, user)
+
+        assert len(round_trips.statements) == 1
+        assert round_trips.commits == 1
+        await session.refresh(user)
+        assert (user.meme_count, user.public_meme_count) == (1, 1)
+        assert meme.owner_id == user.user_id
+        assert meme.view_count == 0
+        fan_out = await session.scalar(
+            delete(Job)
+            .where(Job.idempotency_key == f"{FAN_OUT_MEME}:{meme.id}")
+            .returning(Job.payload)
+        )
+        assert fan_out == {"meme_id": meme.id, "owner_id": user.user_id}
+        await session.commit()
+
+    run(database_url, scenario)
+
+
+def test_update_meme_is_one_statement(database_url):
+    async def scenario(session, round_trips, user):
+        meme = await add(session, user)
+        round_trips.reset()
+
+        await memes.update_meme(
+            meme_id=meme.id,
+            background_tasks=BackgroundTasks(),
+            description="edited",
+            visibility=False,
+            image=None,
+            tags=[],
+            current_user=user,
+            session=session,
+        )
+
+        assert len(round_trips.statements) == 1
+        assert round_trips.commits == 1
+        await session.refresh(user)
+        assert user.public_meme_count == 0
+
+    run(database_url, scenario)
+
+
+def test_update_meme_image_queues_cleanup_in_the_same_statement(database_url):
+    async def scenario(session, round_trips, user):
+        meme = await add(session, user)
+        old_image_url = meme.image_url
+        round_trips.reset()
+
+        updated = await memes.update_meme(
+            meme_id=meme.id,
+            background_tasks=BackgroundTasks(),
+            description="edited",
+            visibility=True,
+            image=upload("new.png"),
+            tags=[],
+            current_user=user,
+            session=session,
+        )
+
+        assert len(round_trips.statements) == 1
+        assert round_trips.commits == 1
+        assert updated.image_url != old_image_url
+        job = await session.scalar(
+            select(Job).where(Job.idempotency_key == image_cleanup_key(old_image_url))
+        )
+        assert job.payload["image_url"] == old_image_url
+        await session.delete(job)
+        await session.commit()
+
+    run(database_url, scenario)
+
+
+def test_delete_meme_is_one_statement(database_url):
+    async def scenario(session, round_trips, user):
+        meme = await add(session, user)
+        round_trips.reset()
+
+        await memes.delete_meme(meme_id=meme.id, current_user=user, session=session)
+
+        assert len(round_trips.statements) == 1
+        assert round_trips.commits == 1
+        await session.refresh(user)
+        assert (user.meme_count, user.public_meme_count) == (0, 0)
+        job = await session.scalar(
+            select(Job).where(Job.idempotency_key == image_cleanup_key(meme.image_url))
+        )
+        assert job.payload == {"image_url": meme.image_url, "variants": {}}
+        await session.delete(job)
+        await session.commit()
+
+    run(database_url, scenario)
+
+
+def test_delete_missing_meme_is_one_statement(database_url):
+    async def scenario(session, round_trips, user):
+        with pytest.raises(HTTPException) as error:
+            await memes.delete_meme(meme_id=-1, current_user=user, session=session)
+
+        assert error.value.status_code == 404
+        assert len(round_trips.statements) == 1
+        await session.rollback()
+
+    run(database_url, scenario)
+
+
+def test_update_meme_keeps_tags_unless_sent(database_url):
+    async def scenario(session, round_trips, user):
+        meme = await add(session, user)
+
+        async def update(**tags) -> Meme:
+            return await memes.update_meme(
+                meme_id=meme.id,
+                background_tasks=BackgroundTasks(),
+                description="edited",
+                visibility=True,
+                image=None,
+                current_user=user,
+                session=session,
+                **tags,
+            )
+
+        assert (await update(tags=None)).tags == ["cat"]
+        assert (await update(tags=["Dog", "dog"])).tags == ["dog"]
+        assert (await update(tags=[""])).tags == []
+
+    run(database_url, scenario)
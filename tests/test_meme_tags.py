@@ -0,0 +1,26 @@
+from scripts.bench_meme_tags import tag_statements, used_indexes
+
+
+def test_used_indexes_walks_the_plan() -> None:
+    plan = {
+        "Node Type": "Limit",
+        "Plans": [
+            {
+                "Node Type": "Bitmap Heap Scan",
+                "Relation Name": "meme_p3",
+                "Plans": [
+                    {"Node Type": "Bitmap Index Scan", "Index Name": "meme_p3_tags_idx"}
+                ],
+            }
+        ],
+    }
+
+    assert used_indexes(plan) == {"meme_p3_tags_idx"}
+
+
+def test_tag_statements_filter_on_all_tags() -> None:
+    statements = tag_statements("owner", ["cat", "dog"], 42)
+
+    for statement in statements.values():
+        assert "meme.tags @>" in str(statement)
+    assert "meme.id >" in str(statements["keyset page"])
@@ -0,0 +1,22 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from scripts.bench_meme_partitioning import scanned_relations
+from src.api.models import Meme
+
+
+def test_meme_is_hash_partitioned_by_owner() -> None:
+    ddl = str(CreateTable(Meme.__table__).compile(dialect=postgresql.dialect()))
+
+    assert "PARTITION BY HASH (owner_id)" in ddl
+    assert "PRIMARY KEY (id, owner_id)" in ddl
+
+
+def test_scanned_relations_walks_the_plan() -> None:
+    plan = {
+        "Node Type": "ModifyTable",
+        "Relation Name": "meme",
+        "Plans": [{"Node Type": "Index Scan", "Relation Name": "meme_p3"}],
+    }
+
+    assert scanned_relations(plan) == {"meme", "meme_p3"}
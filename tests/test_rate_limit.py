@@ -0,0 +1,188 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert, select
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from src.api.endpoints import api_utils, memes
+from src.api.models import RateLimitBucket
+from src.config import RouteLimit, get_settings
+from src.core import database, rate_limit
+from src.core.rate_limit import MemoryBuckets, RouteLimiter, remove_full_buckets
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+class EmptyResult:
+    async def partitions(self):
+        return
+        yield
+
+
+class FakeSession:
+    async def stream_scalars(self, statement: object) -> EmptyResult:
+        return EmptyResult()
+
+
+@asynccontextmanager
+async def fake_session():
+    yield FakeSession()
+
+
+def test_export_holds_concurrency_slot_until_body_is_sent(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(memes.database, "get_async_session", fake_session)
+    limiter = RouteLimiter("export", RouteLimit(rate=1.0, burst=1, max_concurrency=1))
+
+    async def export() -> None:
+        assert await limiter.acquire()
+        body = memes.export_memes("user", limiter)
+        assert limiter.metrics.in_flight == 1
+        async for _ in body:
+            pass
+        assert limiter.metrics.in_flight == 0
+
+    asyncio.run(export())
+
+
+def test_memory_buckets_allow_a_burst_then_refill(clock: Clock) -> None:
+    buckets = MemoryBuckets(max_keys=10)
+    limit = RouteLimit(rate=2.0, burst=3)
+
+    async def take() -> float | None:
+        return await buckets.take("client", limit)
+
+    async def scenario() -> None:
+        assert [await take() for _ in range(3)] == [None, None, None]
+        assert await take() == pytest.approx(0.5)
+        clock.now += 0.5
+        assert await take() is None
+        assert await take() == pytest.approx(0.5)
+        # Idle for long, the bucket refills up to the burst only.
+        clock.now += 60
+        assert [await take() for _ in range(3)] == [None, None, None]
+        assert await take() is not None
+
+    asyncio.run(scenario())
+
+
+def test_memory_buckets_evict_the_least_recently_used(clock: Clock) -> None:
+    buckets = MemoryBuckets(max_keys=2)
+    limit = RouteLimit(rate=0.001, burst=1)
+
+    async def scenario() -> None:
+        for key in ("a", "b", "a", "c"):
+            await buckets.take(key, limit)
+        # "b" was evicted and starts over with a full bucket, "a" was not.
+        assert await buckets.take("b", limit) is None
+        assert await buckets.take("c", limit) is not None
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def limited_app(monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    settings = get_settings().rate_limits
+    monkeypatch.setattr(settings, "enabled", True)
+    monkeypatch.setitem(
+        settings.routes, "test", RouteLimit(rate=0.5, burst=2, max_concurrency=1)
+    )
+    rate_limit.get_route_limiter.cache_clear()
+    buckets = MemoryBuckets(100)
+    monkeypatch.setattr(rate_limit, "get_buckets", lambda: buckets)
+
+    app = FastAPI()
+
+    @app.get("/limited", dependencies=[Depends(api_utils.rate_limit("test"))])
+    def limited() -> dict:
+        return {}
+
+    yield TestClient(app)
+    rate_limit.get_route_limiter.cache_clear()
+
+
+def test_rate_limit_answers_429_with_retry_after(limited_app: TestClient) -> None:
+    statuses = [limited_app.get("/limited").status_code for _ in range(2)]
+    throttled = limited_app.get("/limited")
+
+    assert statuses == [200, 200]
+    assert throttled.status_code == 429
+    assert throttled.headers["Retry-After"] == "2"
+    # The concurrency slots were all released.
+    assert rate_limit.get_route_limiter("test").metrics.in_flight == 0
+    assert rate_limit.get_route_limiter("test").metrics.throttled == 1
+
+
+def test_rate_limit_keys_on_the_forwarded_client(limited_app: TestClient) -> None:
+    # As set up by the uvicorn worker for `server.forwarded_allow_ips`.
+    proxied = TestClient(
+        ProxyHeadersMiddleware(limited_app.app, trusted_hosts="testclient")
+    )
+
+    def get(client: str) -> int:
+        return proxied.get("/limited", headers={"X-Forwarded-For": client}).status_code
+
+    assert [get("10.0.0.1") for _ in range(3)] == [200, 200, 429]
+    assert get("10.0.0.2") == 200
+
+
+def test_remove_full_buckets_keeps_recent_ones(database_url) -> None:
+    refill = timedelta(seconds=rate_limit.get_refill_secs())
+    now = datetime.now(timezone.utc)
+
+    async def scenario() -> None:
+        try:
+            async with database.get_async_session() as session:
+                await session.execute(
+                    insert(RateLimitBucket),
+                    [
+                        {
+                            "key": "test:idle",
+                            "tokens": 0.0,
+                            "allowed": False,
+                            "updated_at": now - refill - timedelta(seconds=5),
+                        },
+                        {
+                            "key": "test:recent",
+                            "tokens": 0.0,
+                            "allowed": False,
+                            "updated_at": now - refill + timedelta(seconds=30),
+                        },
+                    ],
+                )
+                await session.commit()
+
+            assert await remove_full_buckets() >= 1
+            async with database.get_async_session() as session:
+                keys = await session.scalars(
+                    select(RateLimitBucket.key).where(
+                        RateLimitBucket.key.like("test:%")
+                    )
+                )
+                assert keys.all() == ["test:recent"]
+                await session.execute(
+                    delete(RateLimitBucket).where(RateLimitBucket.key.like("test:%"))
+                )
+                await session.commit()
+        finally:
+            await database.dispose()
+
+    asyncio.run(scenario())
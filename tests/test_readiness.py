@@ -0,0 +1,53 @@
+import asyncio
+
+from src.config import get_settings
+from src.core import s3
+from src.core.readiness import Readiness
+
+
+async def healthy() -> None:
+    pass
+
+
+async def failing() -> None:
+    raise ConnectionError("unreachable")
+
+
+def probed(database, storage) -> Readiness:
+    readiness = Readiness()
+    readiness.probes = {"database": database, "storage": storage}
+    readiness.warmed_up = True
+    asyncio.run(readiness.check())
+    return readiness
+
+
+def test_storage_failure_is_reported_but_keeps_ready() -> None:
+    readiness = probed(healthy, failing)
+
+    assert readiness.ready
+    assert not readiness.dependencies["storage"].healthy
+
+
+def test_database_failure_makes_unready() -> None:
+    assert not probed(failing, healthy).ready
+
+
+def test_not_ready_before_warm_up() -> None:
+    readiness = probed(healthy, healthy)
+    readiness.warmed_up = False
+
+    assert not readiness.ready
+
+
+def test_storage_failure_delays_warm_up(monkeypatch) -> None:
+    monkeypatch.setattr(get_settings().database, "pool_warmup", False)
+    monkeypatch.setattr(s3, "open_shared_client", healthy)
+    readiness = Readiness()
+    readiness.probes = {"database": healthy, "storage": failing}
+
+    assert not asyncio.run(readiness.warm_up())
+    assert not readiness.ready
+
+    readiness.probes["storage"] = healthy
+    assert asyncio.run(readiness.warm_up())
+    assert readiness.ready
@@ -0,0 +1,29 @@
+import socket
+
+import pytest
+
+from scripts.bench_startup import deferred_imports, measure_import, measure_ready
+from src.config import get_settings
+
+# Far above the ~1.2 s the import takes, it only catches gross regressions.
+IMPORT_BUDGET_SECS = 5.0
+# Likewise far above the ~2 s a single worker takes to report ready.
+READY_BUDGET_SECS = 15.0
+
+
+def test_app_import_defers_image_libraries():
+    modules = measure_import()
+
+    assert "src.main" in modules
+    assert deferred_imports(modules) == []
+    assert modules["src.main"] / 1e6 < IMPORT_BUDGET_SECS
+
+
+def test_server_ready_within_budget(database_url):
+    endpoint = get_settings().minio.endpoint_url
+    try:
+        socket.create_connection((endpoint.host, endpoint.port), timeout=2).close()
+    except OSError as e:
+        pytest.skip(f"Storage is not reachable: {e}")
+
+    assert measure_ready(timeout_secs=READY_BUDGET_SECS * 2) < READY_BUDGET_SECS
@@ -0,0 +1,264 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+
+from src.api.endpoints.follows import unfollow_user
+from src.api.endpoints.users import delete_current_user
+from src.api.models import Follow, Job, Meme, TimelineEntry, User
+from src.config import get_settings
+from src.core import database
+from src.core.jobs import BACKFILL_TIMELINES, JOB_HANDLERS, image_cleanup_key
+from src.core.timeline import fan_out_meme, trim_all_timelines, trim_timelines
+
+
+async def create_users(session, count: int) -> list[str]:
+    user_ids = [str(uuid.uuid4()) for _ in range(count)]
+    await session.execute(
+        insert(User),
+        [
+            {
+                "user_id": user_id,
+                "email": f"{user_id}@test.invalid",
+                "hashed_password": "x",
+            }
+            for user_id in user_ids
+        ],
+    )
+    return user_ids
+
+
+async def create_memes(session, owner_id: str, count: int) -> list[int]:
+    result = await session.scalars(
+        insert(Meme)
+        .values(
+            [
+                {
+                    "description": "meme",
+                    "image_url": f"memes/{uuid.uuid4()}",
+                    "visibility": True,
+                    "owner_id": owner_id,
+                }
+                for _ in range(count)
+            ]
+        )
+        .returning(Meme.id)
+    )
+    return sorted(result.all())
+
+
+async def timeline(session, user_id: str) -> list[int]:
+    result = await session.scalars(
+        select(TimelineEntry.meme_id)
+        .where(TimelineEntry.user_id == user_id)
+        .order_by(TimelineEntry.meme_id)
+    )
+    return result.all()
+
+
+def run(scenario) -> None:
+    async def main() -> None:
+        try:
+            await scenario()
+        finally:
+            await database.dispose()
+
+    asyncio.run(main())
+
+
+@pytest.fixture
+def max_length(monkeypatch) -> int:
+    monkeypatch.setattr(get_settings().timeline, "max_length", 3)
+    return 3
+
+
+def test_trim_cuts_only_timelines_over_the_limit(database_url, max_length):
+    async def scenario():
+        async with database.get_async_session() as session:
+            owner, long_reader, short_reader = await create_users(session, 3)
+            meme_ids = await create_memes(session, owner, 5)
+            await session.execute(
+                insert(TimelineEntry),
+                [
+                    {"user_id": reader, "meme_id": meme_id, "meme_owner_id": owner}
+                    for reader, count in ((long_reader, 5), (short_reader, 2))
+                    for meme_id in meme_ids[-count:]
+                ],
+            )
+            result = await session.execute(
+                trim_timelines(
+                    select(User.user_id).where(
+                        User.user_id.in_([long_reader, short_reader])
+                    )
+                )
+            )
+
+            assert result.rowcount == 2
+            assert await timeline(session, long_reader) == meme_ids[-max_length:]
+            assert await timeline(session, short_reader) == meme_ids[-2:]
+            await session.rollback()
+
+    run(scenario)
+
+
+def test_trim_all_timelines_walks_every_batch(database_url, max_length, monkeypatch):
+    monkeypatch.setattr(get_settings().timeline, "trim_batch_size", 1)
+
+    async def scenario():
+        async with database.get_async_session() as session:
+            owner, *readers = await create_users(session, 3)
+            meme_ids = await create_memes(session, owner, 4)
+            await session.execute(
+                insert(TimelineEntry),
+                [
+                    {"user_id": reader, "meme_id": meme_id, "meme_owner_id": owner}
+                    for reader in readers
+                    for meme_id in meme_ids
+                ],
+            )
+            await session.commit()
+        try:
+            assert await trim_all_timelines() >= 2
+            async with database.get_async_session() as session:
+                for reader in readers:
+                    assert await timeline(session, reader) == meme_ids[-max_length:]
+        finally:
+            async with database.get_async_session() as session:
+                await session.execute(
+                    delete(User).where(User.user_id.in_([owner, *readers]))
+                )
+                await session.commit()
+
+    run(scenario)
+
+
+def test_delete_user_decrements_followees_and_queues_cleanup(database_url):
+    async def scenario():
+        async with database.get_async_session() as session:
+            deleted, followee, bystander = await create_users(session, 3)
+            (meme_id,) = await create_memes(session, deleted, 1)
+            image_url = await session.scalar(
+                select(Meme.image_url).where(Meme.id == meme_id)
+            )
+            await session.execute(
+                insert(Follow),
+                [
+                    {"follower_id": deleted, "followee_id": followee},
+                    {"follower_id": bystander, "followee_id": followee},
+                    {"follower_id": bystander, "followee_id": deleted},
+                ],
+            )
+            await session.execute(
+                User.__table__.update()
+                .where(User.user_id.in_([followee, deleted]))
+                .values(follower_count=func.cast(2, User.follower_count.type))
+            )
+
+            await delete_current_user(
+                current_user=User(user_id=deleted), session=session
+            )
+
+            counts = dict(
+                (
+                    await session.execute(
+                        select(User.user_id, User.follower_count).where(
+                            User.user_id.in_([deleted, followee, bystander])
+                        )
+                    )
+                ).all()
+            )
+            assert counts == {followee: 1, bystander: 0}
+            job = await session.scalar(
+                select(Job).where(Job.idempotency_key == image_cleanup_key(image_url))
+            )
+            assert job.priority == -1
+            await session.execute(delete(Job).where(Job.id == job.id))
+            await session.execute(
+                delete(User).where(User.user_id.in_([followee, bystander]))
+            )
+            await session.commit()
+
+    run(scenario)
+
+
+@pytest.fixture
+def fan_out_max_followers(monkeypatch) -> int:
+    monkeypatch.setattr(get_settings().timeline, "fan_out_max_followers", 1)
+    return 1
+
+
+async def set_follower_counts(session, owner: str, followers: list[str]) -> None:
+    await session.execute(
+        insert(Follow),
+        [{"follower_id": follower, "followee_id": owner} for follower in followers],
+    )
+    await session.execute(
+        User.__table__.update()
+        .where(User.user_id == owner)
+        .values(follower_count=len(followers))
+    )
+
+
+def test_fan_out_skips_large_accounts_and_deleted_memes(
+    database_url, fan_out_max_followers
+):
+    async def scenario():
+        async with database.get_async_session() as session:
+            small, large, reader = await create_users(session, 3)
+            await set_follower_counts(session, small, [reader])
+            await set_follower_counts(session, large, [reader, small])
+            kept, deleted = await create_memes(session, small, 2)
+            (pulled,) = await create_memes(session, large, 1)
+            await session.execute(delete(Meme).where(Meme.id == deleted))
+            await session.commit()
+        try:
+            await fan_out_meme(kept, small)
+            await fan_out_meme(deleted, small)
+            await fan_out_meme(pulled, large)
+            async with database.get_async_session() as session:
+                assert await timeline(session, reader) == [kept]
+        finally:
+            async with database.get_async_session() as session:
+                await session.execute(
+                    delete(User).where(User.user_id.in_([small, large, reader]))
+                )
+                await session.commit()
+
+    run(scenario)
+
+
+def test_unfollow_back_to_fan_out_backfills_pulled_memes(
+    database_url, fan_out_max_followers
+):
+    async def scenario():
+        async with database.get_async_session() as session:
+            owner, staying, leaving = await create_users(session, 3)
+            await set_follower_counts(session, owner, [staying, leaving])
+            # Posted while pulled at read time, never fanned out.
+            meme_ids = await create_memes(session, owner, 3)
+            await session.commit()
+
+            await unfollow_user(
+                user_id=owner, current_user=User(user_id=leaving), session=session
+            )
+        try:
+            async with database.get_async_session() as session:
+                job = await session.scalar(
+                    select(Job).where(
+                        Job.idempotency_key == f"{BACKFILL_TIMELINES}:{owner}"
+                    )
+                )
+            await JOB_HANDLERS[job.kind](job.payload)
+            async with database.get_async_session() as session:
+                assert await timeline(session, staying) == meme_ids
+                assert await timeline(session, leaving) == []
+        finally:
+            async with database.get_async_session() as session:
+                await session.execute(delete(Job).where(Job.id == job.id))
+                await session.execute(
+                    delete(User).where(User.user_id.in_([owner, staying, leaving]))
+                )
+                await session.commit()
+
+    run(scenario)
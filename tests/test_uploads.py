@@ -0,0 +1,255 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+from sqlalchemy import delete, func, insert, select
+
+from src.api.endpoints import memes
+from src.api.models import Job, Meme, User
+from src.api.schemas.requests import MemeUploadConfirmRequest, MemeUploadRequest
+from src.config import get_settings
+from src.core import database, jobs
+from src.core.jobs import DELETE_UNCONFIRMED_UPLOAD, image_cleanup_key
+
+
+def run(scenario) -> None:
+    async def main() -> None:
+        user = User(
+            user_id=str(uuid.uuid4()),
+            email=f"{uuid.uuid4()}@test.invalid",
+            hashed_password="x",
+        )
+        async with database.get_async_session() as session:
+            session.add(user)
+            await session.commit()
+        try:
+            await scenario(user)
+        finally:
+            async with database.get_async_session() as session:
+                await session.execute(delete(User).where(User.user_id == user.user_id))
+                await session.execute(
+                    delete(Job).where(Job.payload["owner_id"].astext == user.user_id)
+                )
+                await session.commit()
+            await database.dispose()
+
+    asyncio.run(main())
+
+
+def confirm_request(image_path: str) -> MemeUploadConfirmRequest:
+    return MemeUploadConfirmRequest(
+        image_path=image_path, description="meme", visibility=True
+    )
+
+
+def stored_image(age: timedelta = timedelta()) -> dict:
+    return {
+        "ContentLength": 1,
+        "ContentType": "image/png",
+        "LastModified": datetime.now(timezone.utc) - age,
+    }
+
+
+async def insert_meme(owner_id: str, image_path: str) -> None:
+    async with database.get_async_session() as session:
+        await session.execute(
+            insert(Meme).values(
+                description="meme",
+                image_url=image_path,
+                visibility=True,
+                owner_id=owner_id,
+            )
+        )
+        await session.commit()
+
+
+@pytest.fixture
+def deleted_images(monkeypatch) -> list[str]:
+    deleted = []
+
+    async def delete_image(image_path: str) -> None:
+        deleted.append(image_path)
+
+    monkeypatch.setattr(memes, "delete_image", delete_image)
+    monkeypatch.setattr(jobs, "delete_image", delete_image)
+    monkeypatch.setattr(get_settings().image_hash, "enabled", False)
+    return deleted
+
+
+def test_upload_policy_schedules_cleanup(database_url, monkeypatch):
+    async def create_upload_policy(image_path: str, content_type: str) -> dict:
+        return {"url": "http://storage", "fields": {}}
+
+    monkeypatch.setattr(memes, "create_upload_policy", create_upload_policy)
+
+    async def scenario(user):
+        async with database.get_async_session() as session:
+            upload = await memes.create_meme_upload(
+                upload=MemeUploadRequest(filename="meme.png", content_type="image/png"),
+                session=session,
+                current_user=user,
+            )
+            job = await session.scalar(
+                select(Job).where(
+                    Job.idempotency_key
+                    == image_cleanup_key(upload.image_path, DELETE_UNCONFIRMED_UPLOAD)
+                )
+            )
+            delay = await session.scalar(
+                select(Job.run_at - func.now()).where(Job.id == job.id)
+            )
+
+        settings = get_settings().minio
+        assert job.payload == {
+            "image_path": upload.image_path,
+            "owner_id": user.user_id,
+        }
+        assert delay > timedelta(
+            seconds=settings.upload_expire_secs + settings.upload_confirm_secs
+        )
+
+    run(scenario)
+
+
+def test_cleanup_deletes_only_unconfirmed_uploads(database_url, deleted_images):
+    async def scenario(user):
+        confirmed = f"uploads/{user.user_id}/{uuid.uuid4()}/meme.png"
+        unconfirmed = f"uploads/{user.user_id}/{uuid.uuid4()}/meme.png"
+        await insert_meme(user.user_id, confirmed)
+
+        for image_path in (confirmed, unconfirmed):
+            await jobs.delete_unconfirmed_upload(
+                {"image_path": image_path, "owner_id": user.user_id}
+            )
+
+        assert deleted_images == [unconfirmed]
+
+    run(scenario)
+
+
+@pytest.fixture
+def storage(monkeypatch) -> list[tuple[str, str]]:
+    """Stub the policy and the stored uploads, record the copies."""
+    copies = []
+
+    async def create_upload_policy(image_path: str, content_type: str) -> dict:
+        return {"url": "http://storage", "fields": {}}
+
+    async def head_image(path: str) -> dict:
+        return stored_image()
+
+    async def copy_image(source_path: str, file_path: str) -> None:
+        copies.append((source_path, file_path))
+
+    monkeypatch.setattr(memes, "create_upload_policy", create_upload_policy)
+    monkeypatch.setattr(memes, "head_image", head_image)
+    monkeypatch.setattr(memes, "copy_image", copy_image)
+    return copies
+
+
+async def create_upload(user: User) -> str:
+    async with database.get_async_session() as session:
+        upload = await memes.create_meme_upload(
+            upload=MemeUploadRequest(filename="meme.png", content_type="image/png"),
+            session=session,
+            current_user=user,
+        )
+    return upload.image_path
+
+
+async def confirm(user: User, image_path: str) -> Meme:
+    async with database.get_async_session() as session:
+        return await memes.confirm_meme_upload(
+            background_tasks=BackgroundTasks(),
+            upload=confirm_request(image_path),
+            session=session,
+            current_user=user,
+        )
+
+
+def test_confirm_copies_the_upload_once(database_url, deleted_images, storage):
+    async def scenario(user):
+        image_path = await create_upload(user)
+
+        meme = await confirm(user, image_path)
+        with pytest.raises(HTTPException) as error:
+            await confirm(user, image_path)
+
+        # A reused policy can only overwrite the upload, not the meme's image.
+        assert storage == [(image_path, meme.image_url)]
+        assert meme.image_url != image_path
+        assert error.value.detail == "Upload already confirmed."
+        await jobs.delete_unconfirmed_upload(
+            {"image_path": meme.image_url, "owner_id": user.user_id}
+        )
+        assert deleted_images == []
+
+    run(scenario)
+
+
+def test_racing_confirm_is_rejected_and_keeps_the_image(
+    database_url, deleted_images, storage, monkeypatch
+):
+    async def scenario(user):
+        image_path = await create_upload(user)
+
+        async def head_image(path: str) -> dict:
+            # The other confirm commits after this one's token check.
+            monkeypatch.setattr(memes, "head_image", stored_head_image)
+            await confirm(user, image_path)
+            return stored_image()
+
+        stored_head_image = memes.head_image
+
+        monkeypatch.setattr(memes, "head_image", head_image)
+
+        with pytest.raises(HTTPException) as error:
+            await confirm(user, image_path)
+        async with database.get_async_session() as session:
+            count = await session.scalar(
+                select(func.count()).where(Meme.owner_id == user.user_id)
+            )
+
+        assert error.value.detail == "Upload already confirmed."
+        assert count == 1
+        assert deleted_images == []
+
+    run(scenario)
+
+
+def test_upload_key_taken_by_a_meme_is_refused(database_url, storage, monkeypatch):
+    taken = uuid.uuid4()
+    monkeypatch.setattr(memes.uuid, "uuid4", lambda: taken)
+
+    async def scenario(user):
+        await insert_meme(user.user_id, f"uploads/{user.user_id}/{taken}/meme.png")
+
+        with pytest.raises(HTTPException) as error:
+            await create_upload(user)
+
+        assert error.value.status_code == 409
+
+    run(scenario)
+
+
+def test_confirm_rejects_expired_uploads(
+    database_url, deleted_images, storage, monkeypatch
+):
+    async def head_image(path: str) -> dict:
+        age = get_settings().minio.upload_confirm_secs + 1
+        return stored_image(timedelta(seconds=age))
+
+    async def scenario(user):
+        image_path = await create_upload(user)
+        monkeypatch.setattr(memes, "head_image", head_image)
+
+        with pytest.raises(HTTPException) as error:
+            await confirm(user, image_path)
+
+        assert error.value.status_code == 400
+        assert error.value.detail.startswith("Upload expired")
+        assert storage == []
+
+    run(scenario)